@@ -0,0 +1,303 @@
+"""
+Benchmarks for spectrogram, ispectrogram and roundtrips
+
+Measures latency (best time per call), throughput (samples per second) and
+peak memory (via :code:`tracemalloc`) across signal lengths, framelengths,
+overlaps, channels, padding, halved and precision.
+
+The time of :code:`import stft` and of the first transform are measured in
+fresh interpreters. Importing must not take longer than importing NumPy
+alone by more than :code:`--import-budget` times the time of importing
+NumPy, otherwise the run fails. Being relative, the budget holds on slow
+and fast machines alike.
+
+Usage::
+
+    python benchmarks/run_benchmarks.py --save baseline.json
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+:code:`--compare` flags every case that got slower than the baseline by
+more than :code:`--threshold` and exits with status 1. Importing NumPy is
+only measured as the reference of the budget and never flagged.
+
+"""
+from __future__ import division, print_function
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+import numpy
+import stft
+
+
+# Settings that all cases are derived from
+BASE = {
+    'length': 2 ** 18,
+    'framelength': 1024,
+    'overlap': 2,
+    'channels': 1,
+    'padding': 0,
+    'halved': True,
+    'dtype': 'float64',
+}
+
+# Values each setting is swept over
+SWEEP = {
+    'length': [2 ** 14, 2 ** 18, 2 ** 22],
+    'framelength': [256, 1024, 4096],
+    'overlap': [2, 4, 8],
+    'channels': [1, 2, 8],
+    'padding': [0, 1],
+    'halved': [True, False],
+    'dtype': ['float64', 'float32'],
+}
+
+OPERATIONS = ['spectrogram', 'ispectrogram', 'roundtrip']
+
+# Code timed in fresh interpreters, after importing NumPy
+IMPORTS = {
+    'numpy': 'pass',
+    'stft': 'import stft',
+    'spectrogram': (
+        'import stft; stft.ispectrogram(stft.spectrogram(numpy.ones(4096)))'
+    ),
+}
+
+# Time that import stft may take on top of import numpy, relative to the
+# time of import numpy
+IMPORT_BUDGET = 1.0
+
+# Measured only as the reference of IMPORT_BUDGET
+REFERENCE = 'import:numpy'
+
+
+def cases(full=False):
+    """Yield benchmark settings. By default each setting is varied on its
+    own, :code:`full` yields the entire cartesian product.
+
+    """
+    if full:
+        keys = sorted(SWEEP)
+        for values in itertools.product(*(SWEEP[k] for k in keys)):
+            yield dict(zip(keys, values))
+        return
+
+    seen = set()
+    for key in sorted(SWEEP):
+        for value in SWEEP[key]:
+            case = dict(BASE, **{key: value})
+            name = case_name(case)
+            if name not in seen:
+                seen.add(name)
+                yield case
+
+
+def case_name(case):
+    return ','.join('%s=%s' % (k, case[k]) for k in sorted(case))
+
+
+def operation(op, case):
+    """Return a callable running :code:`op` for the settings :code:`case`
+
+    """
+    signal = numpy.squeeze(
+        numpy.random.random((case['length'], case['channels']))
+    )
+    settings = dict(
+        framelength=case['framelength'],
+        overlap=case['overlap'],
+        padding=case['padding'],
+        halved=case['halved'],
+        dtype=case['dtype'],
+    )
+    spectrum = stft.spectrogram(signal, **settings)
+
+    if op == 'spectrogram':
+        return lambda: stft.spectrogram(signal, **settings)
+    elif op == 'ispectrogram':
+        return lambda: stft.ispectrogram(spectrum)
+    elif op == 'roundtrip':
+        return lambda: stft.ispectrogram(stft.spectrogram(signal, **settings))
+    raise ValueError("Unknown operation %s" % op)
+
+
+def measure(func, length, repeat=5):
+    """Return best time per call, throughput and peak memory of a callable
+
+    """
+    func()
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number=number)
+        if elapsed > 0.2 or number >= 1000:
+            break
+        number *= 2
+
+    best = min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'time': best,
+        'throughput': length / best,
+        'peakmem': peak,
+    }
+
+
+def measure_import(code, repeat=5):
+    """Return best time of running :code:`code` in a fresh interpreter,
+    including importing NumPy
+
+    """
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.path.dirname(os.path.dirname(stft.__file__))
+    )
+    script = (
+        'import time; t = time.perf_counter(); import numpy; %s; '
+        'print(time.perf_counter() - t)' % code
+    )
+
+    best = min(
+        float(subprocess.check_output([sys.executable, '-c', script], env=env))
+        for _ in range(repeat)
+    )
+
+    return {'time': best}
+
+
+def over_budget(results, budget=IMPORT_BUDGET):
+    """Return the names of all imports taking longer than importing NumPy by
+    more than :code:`budget` times the time of importing NumPy
+
+    """
+    if REFERENCE not in results or 'import:stft' not in results:
+        return []
+
+    limit = results[REFERENCE]['time'] * (1 + budget)
+    return [
+        name for name in ['import:stft']
+        if results[name]['time'] > limit
+    ]
+
+
+def run(full=False, repeat=5, operations=OPERATIONS, imports=True,
+        out=sys.stdout):
+    results = {}
+
+    if imports:
+        for name in sorted(IMPORTS):
+            results['import:' + name] = measure_import(IMPORTS[name], repeat)
+            print(
+                '%-100s %10.3f ms' % (
+                    'import:' + name, results['import:' + name]['time'] * 1e3
+                ),
+                file=out
+            )
+
+    for case in cases(full):
+        for op in operations:
+            name = '%s:%s' % (op, case_name(case))
+            results[name] = measure(
+                operation(op, case), case['length'], repeat=repeat
+            )
+            print(
+                '%-100s %10.3f ms %10.2f MS/s %10.2f MB' % (
+                    name,
+                    results[name]['time'] * 1e3,
+                    results[name]['throughput'] / 1e6,
+                    results[name]['peakmem'] / 2 ** 20,
+                ),
+                file=out
+            )
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """Return the names of all cases that are slower than the baseline by
+    more than :code:`threshold`, relative
+
+    """
+    return [
+        name for name in sorted(results)
+        if name != REFERENCE and name in baseline and
+        results[name]['time'] > baseline[name]['time'] * (1 + threshold)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--full', action='store_true',
+                        help='Run the full cartesian product of settings')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of timing repetitions')
+    parser.add_argument('--operation', action='append', choices=OPERATIONS,
+                        help='Operations to benchmark, defaults to all')
+    parser.add_argument('--no-imports', action='store_true',
+                        help='Skip measuring import times')
+    parser.add_argument('--import-budget', type=float, default=IMPORT_BUDGET,
+                        help='Time import stft may add to import numpy, '
+                        'relative to import numpy, defaults to %s' % (
+                            IMPORT_BUDGET
+                        ))
+    parser.add_argument('--save', metavar='JSON',
+                        help='Save results to a baseline file')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='Compare results to a baseline file')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative slowdown to flag, defaults to 0.1')
+    args = parser.parse_args(argv)
+
+    results = run(
+        full=args.full,
+        repeat=args.repeat,
+        operations=args.operation or OPERATIONS,
+        imports=not args.no_imports,
+    )
+
+    status = 0
+    for name in over_budget(results, args.import_budget):
+        print(
+            'OVER BUDGET: %s %.3f ms, budget %.3f ms over %s' % (
+                name,
+                results[name]['time'] * 1e3,
+                results[REFERENCE]['time'] * args.import_budget * 1e3,
+                REFERENCE,
+            )
+        )
+        status = 1
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+        slower = compare(results, baseline, args.threshold)
+        for name in slower:
+            print(
+                'SLOWER: %s %.3f ms -> %.3f ms' % (
+                    name,
+                    baseline[name]['time'] * 1e3,
+                    results[name]['time'] * 1e3,
+                )
+            )
+        if slower:
+            status = 1
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
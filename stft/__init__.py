@@ -1,5 +1,23 @@
 from __future__ import absolute_import
 
-from .stft import spectrogram, ispectrogram
+from .stft import spectrogram, ispectrogram, STFTPlan
+from .batch import spectrogram_batch, ispectrogram_batch
+from .profiling import profile
+from .storage import save, load
+from .phase import griffin_lim
+from .filterbank import features
+from .files import process_files
+from .aio import aiter_spectrogram
+from .streaming import (
+    StreamingSTFT, StreamingISTFT, SlidingSpectrogram, iter_spectrogram,
+    iter_ispectrogram
+)
 
-__all__ = ["spectrogram", "ispectrogram"]
+__all__ = [
+    "spectrogram", "ispectrogram", "STFTPlan", "spectrogram_batch",
+    "ispectrogram_batch",
+    "StreamingSTFT", "StreamingISTFT", "SlidingSpectrogram",
+    "iter_spectrogram", "iter_ispectrogram",
+    "profile", "save", "load", "griffin_lim", "features", "process_files",
+    "aiter_spectrogram"
+]
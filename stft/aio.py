@@ -0,0 +1,102 @@
+"""
+Module to transform signals arriving in an :code:`asyncio` event loop
+
+"""
+from __future__ import division, absolute_import
+import collections
+from .streaming import StreamingSTFT
+from . import profiling
+
+
+async def aiter_spectrogram(
+    blocks,
+    executor=None,
+    max_pending=4,
+    **kwargs
+):
+    """Calculate the spectrogram of a signal arriving as an asynchronous
+    stream of blocks of arbitrary size
+
+    The blocks are cut into frames in the event loop, in order, exactly like
+    :class:`stft.StreamingSTFT` does. The transforms of the frames run in
+    :code:`executor`, so that the event loop is never blocked by them.
+    Finished transforms are yielded in order as soon as they are done. At
+    most :code:`max_pending` transforms are in flight: once the limit is
+    reached, no further blocks are consumed until the oldest transform has
+    been yielded. The frames are identical to those of
+    :func:`stft.spectrogram` of the entire signal.
+
+    Parameters
+    ----------
+    blocks : async iterable
+        The blocks of samples, each in the shape of :code:`samples` or
+        :code:`samples x channels`.
+    executor : concurrent.futures.Executor
+        Executor to run the transforms in. Defaults to the default executor
+        of the event loop.
+    max_pending : int
+        Maximum number of blocks being transformed at once. Defaults to
+        :code:`4`.
+    kwargs :
+        Transform settings, see :class:`stft.StreamingSTFT`.
+
+    Yields
+    ------
+    frame_index : int
+        Index of the first frame in this block
+    block : SpectrogramArray
+        Consecutive frames of the spectrogram, see
+        :func:`stft.iter_spectrogram`.
+
+    Examples
+    --------
+    >>> import asyncio, numpy, stft
+    >>> async def source():
+    ...     for block in numpy.split(numpy.random.random(8192), 8):
+    ...         yield block
+    >>> async def main():
+    ...     return [i async for i, _ in stft.aiter_spectrogram(source())]
+    >>> asyncio.run(main())
+    [0, 2, 4, 6, 8, 10, 12, 14, 16]
+
+    """
+    import asyncio
+
+    if max_pending < 1:
+        raise ValueError("aiter_spectrogram: max_pending must be positive")
+
+    loop = asyncio.get_running_loop()
+    s = StreamingSTFT(**kwargs)
+    compute = profiling.propagate(s._compute)
+    pending = collections.deque()
+
+    def submit(frames):
+        pending.append(loop.run_in_executor(
+            executor, compute, *s._schedule(frames)
+        ))
+
+    index = 0
+    try:
+        async for block in blocks:
+            frames = s._frames(block)
+            s.length += len(block)
+            if frames.shape[-2] > 0:
+                submit(frames)
+
+            while pending and (
+                len(pending) >= max_pending or pending[0].done()
+            ):
+                block = await pending.popleft()
+                yield index, block
+                index += block.shape[1]
+
+        if s.buffer is not None:
+            submit(s._tail())
+
+        while pending:
+            block = await pending.popleft()
+            yield index, block
+            index += block.shape[1]
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,315 @@
+"""
+Module to select the FFT implementation
+
+A backend is any object or module providing batched :code:`fft`,
+:code:`ifft`, :code:`rfft` and :code:`irfft` functions with the signatures
+of :code:`scipy.fft`, transforming along the last axis. :code:`'numpy'` is
+always available, :code:`'scipy'` and :code:`'pyfftw'` if they are installed.
+:code:`'scipy'` is the default, falling back to :code:`'numpy'`.
+
+Backends are only imported when they are first used, so that
+:code:`import stft` does not pay for importing SciPy.
+
+:code:`backend='auto'` times all available backends once for each
+configuration and caches the fastest in
+:code:`$STFT_CACHE_DIR/backends.json`, defaulting to
+:code:`$XDG_CACHE_HOME/stft` or :code:`~/.cache/stft`.
+
+"""
+from __future__ import division, absolute_import
+import os
+import sys
+import json
+import timeit
+import tempfile
+import importlib
+import importlib.util
+import numpy
+from . import types
+from .types import register_transform
+
+
+# Registered backends, by name
+_backends = {}
+
+# Backends that have not been imported yet, by name, see _register_lazy()
+_pending = {}
+
+# Real-valued counterparts of complex transforms, used for halved spectra
+_real_transforms = {}
+_real_itransforms = {}
+
+# Transforms that can write into an existing array using out=
+_out_transforms = set()
+
+# Fastest backend by configuration, see autotune()
+_tuned = None
+
+
+def register_backend(name, backend):
+    """Register an FFT backend
+
+    Its transforms are registered using
+    :func:`stft.types.register_transform` and their real-valued variants
+    are used for halved spectra.
+
+    Parameters
+    ----------
+    name : str
+        The name
+    backend : module, object
+        Provides :code:`fft`, :code:`ifft`, :code:`rfft` and :code:`irfft`
+        like :code:`scipy.fft`
+
+    """
+    prefix = getattr(backend, '__name__', name)
+    for kind in ('fft', 'ifft', 'rfft', 'irfft'):
+        transform = getattr(backend, kind)
+        register_transform('%s.%s' % (prefix, kind), transform)
+
+        if _accepts_out(transform):
+            _out_transforms.add(transform)
+
+    _real_transforms[backend.fft] = backend.rfft
+    _real_itransforms[backend.ifft] = backend.irfft
+    _backends[name] = backend
+    _pending.pop(name, None)
+
+
+def _accepts_out(function):
+    """Whether :code:`function` has an :code:`out` parameter. Only Python
+    functions, possibly wrapped, are inspected.
+
+    """
+    while hasattr(function, '__wrapped__'):
+        function = function.__wrapped__
+
+    code = getattr(function, '__code__', None)
+    if code is None:
+        return False
+
+    return 'out' in code.co_varnames[
+        :code.co_argcount + code.co_kwonlyargcount
+    ]
+
+
+def _register_lazy(name, module, loader=None):
+    """Register a backend that is imported on first use
+
+    Parameters
+    ----------
+    name : str
+        The name
+    module : str
+        Name of the module providing the transforms
+    loader : callable
+        Imports and returns the backend. Defaults to importing
+        :code:`module`.
+
+    """
+    if importlib.util.find_spec(module.split('.')[0]) is None:
+        return
+
+    if loader is None:
+        def loader():
+            return importlib.import_module(module)
+
+    _pending[name] = (module, loader)
+    for kind in ('fft', 'ifft', 'rfft', 'irfft'):
+        types._lazy_transforms['%s.%s' % (module, kind)] = (
+            lambda: get_backend(name)
+        )
+
+
+def _load_imported():
+    """Register pending backends whose modules have already been imported
+    elsewhere, so that their transforms are recognized when passed directly
+
+    """
+    for name, (module, loader) in list(_pending.items()):
+        if module in sys.modules:
+            get_backend(name)
+
+
+def _load_all():
+    """Register all pending backends
+
+    """
+    for name in list(_pending):
+        try:
+            get_backend(name)
+        except ValueError:
+            pass
+
+
+def default():
+    """Name of the default backend, :code:`'scipy'` if it is installed
+
+    """
+    return 'scipy' if 'scipy' in _backends or 'scipy' in _pending else 'numpy'
+
+
+def get_backend(name):
+    """Return a registered FFT backend
+
+    Parameters
+    ----------
+    name : str
+        The name
+
+    Returns
+    -------
+    backend : module, object
+        The backend
+
+    """
+    if name in _pending:
+        module, loader = _pending.pop(name)
+        try:
+            register_backend(name, loader())
+        except ImportError:
+            # Installed, but broken
+            pass
+
+    try:
+        return _backends[name]
+    except KeyError:
+        raise ValueError(
+            "Unknown backend %s, must be one of %s" % (
+                name, ', '.join(sorted(_backends))
+            )
+        )
+
+
+def backends():
+    """Names of all available backends
+
+    """
+    return sorted(set(_backends) | set(_pending))
+
+
+def _name(transform):
+    """Name of the backend whose forward or inverse transform is
+    :code:`transform`, or :code:`None`
+
+    """
+    _load_imported()
+    for name, backend in _backends.items():
+        if transform is backend.fft or transform is backend.ifft:
+            return name
+    return None
+
+
+def cache_dir():
+    """Directory the results of :func:`autotune` are stored in
+
+    """
+    if 'STFT_CACHE_DIR' in os.environ:
+        return os.environ['STFT_CACHE_DIR']
+
+    return os.path.join(
+        os.environ.get(
+            'XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')
+        ),
+        'stft'
+    )
+
+
+def _cache_file():
+    return os.path.join(cache_dir(), 'backends.json')
+
+
+def _load():
+    global _tuned
+    if _tuned is None:
+        try:
+            with open(_cache_file()) as f:
+                _tuned = json.load(f)
+        except (OSError, ValueError):
+            _tuned = {}
+    return _tuned
+
+
+def _save():
+    path = _cache_file()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'w') as f:
+            json.dump(_tuned, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+    except OSError:
+        # The cache is optional, e.g. on read-only filesystems
+        pass
+
+
+def _time(backend, framelength, halved, dtype, frames=64, repeat=3):
+    """Best time of a forward and inverse transform of a batch of frames
+
+    """
+    # A local generator keeps the random stream of the user untouched
+    data = numpy.random.RandomState(0).random_sample(
+        (frames, framelength)
+    ).astype(dtype)
+
+    if halved:
+        def run():
+            backend.irfft(backend.rfft(data), n=framelength)
+    else:
+        def run():
+            backend.ifft(backend.fft(data))
+
+    run()
+    number = 1
+    while timeit.timeit(run, number=number) < 0.02 and number < 1000:
+        number *= 2
+
+    return min(timeit.repeat(run, number=number, repeat=repeat)) / number
+
+
+def autotune(framelength=1024, padding=0, halved=True, dtype=None):
+    """Find the fastest available backend for a configuration
+
+    The backends are timed only once per configuration, the result is kept
+    in memory and on disk, see :func:`cache_dir`.
+
+    Parameters
+    ----------
+    framelength, padding, halved, dtype :
+        See :func:`stft.spectrogram`
+
+    Returns
+    -------
+    name : str
+        Name of the fastest backend
+
+    """
+    if dtype is None:
+        dtype = numpy.float64
+    dtype = numpy.dtype(dtype)
+
+    key = '%d-%d-%s-%s' % (framelength, padding, bool(halved), dtype.name)
+
+    _load_all()
+    tuned = _load()
+    if tuned.get(key) not in _backends:
+        n = framelength * (padding + 1)
+        tuned[key] = min(
+            sorted(_backends),
+            key=lambda name: _time(_backends[name], n, halved, dtype)
+        )
+        _save()
+
+    return tuned[key]
+
+
+def _pyfftw():
+    import pyfftw.interfaces.scipy_fft
+    import pyfftw.interfaces.cache
+    pyfftw.interfaces.cache.enable()
+    return pyfftw.interfaces.scipy_fft
+
+
+register_backend('numpy', numpy.fft)
+_register_lazy('scipy', 'scipy.fft')
+_register_lazy('pyfftw', 'pyfftw.interfaces.scipy_fft', _pyfftw)
@@ -0,0 +1,294 @@
+"""
+Module to transform many independent signals at once
+
+"""
+from __future__ import division, absolute_import
+import numpy
+import itertools
+from .types import SpectrogramArray
+from .stft import get_plan, _cast, _process_frames, _iprocess_frames
+from . import utils
+
+
+def spectrogram_batch(
+    signals,
+    framelength=1024,
+    hopsize=None,
+    overlap=None,
+    centered=True,
+    window=None,
+    halved=True,
+    transform=None,
+    padding=0,
+    save_settings=True,
+    dtype=None,
+    workers=None,
+    padded=False,
+    backend=None,
+):
+    """Calculate the spectrograms of many signals of possibly different length
+
+    Settings are resolved and the window is calculated only once. Signals
+    that result in the same number of frames are grouped and transformed in
+    a single batch.
+
+    Parameters
+    ----------
+    signals : list of array_like
+        The signals to be transformed. Each may be a 1D vector for single
+        channel or a 2D matrix of shape :code:`samples x channels` for multi
+        channel data.
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, save_settings, dtype, workers, backend :
+        See :func:`stft.spectrogram`.
+    padded : boolean
+        Return a single zero-padded tensor instead of a list of spectrograms.
+        Defaults to :code:`False`.
+
+    Returns
+    -------
+    data : list of SpectrogramArray, SpectrogramArray
+        A list of spectrograms, as returned by :func:`stft.spectrogram`. If
+        :code:`padded` is set, a tensor of shape :code:`signals x bins x
+        frames` or :code:`signals x bins x frames x channels`, zero-padded to
+        the longest spectrogram.
+    lengths : array_like
+        Only returned if :code:`padded` is set. The length of each input
+        signal, to be passed to :func:`ispectrogram_batch`.
+
+    """
+    plan = get_plan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=halved,
+        transform=transform,
+        padding=padding,
+        dtype=dtype,
+        backend=backend,
+    )
+
+    signals = [numpy.squeeze(signal) for signal in signals]
+
+    if halved and any(numpy.any(numpy.iscomplex(s)) for s in signals):
+        raise ValueError("You cannot treat a complex input signal as real "
+                         "valued. Please set keyword argument halved=False.")
+
+    if any(s.ndim > 2 for s in signals):
+        raise ValueError("spectrogram: Only 1D or 2D input data allowed")
+
+    if padded and len(set(s.shape[1:] for s in signals)) > 1:
+        raise ValueError("spectrogram_batch: All signals must have the same "
+                         "number of channels to be padded")
+
+    offset = plan.framelength // 2 if plan.centered else 0
+
+    # Group signals by their number of frames
+    groups = {}
+    for i, signal in enumerate(signals):
+        frames = plan.frames(len(signal))
+        groups.setdefault((frames, signal.shape[1:]), []).append(i)
+
+    results = [None] * len(signals)
+    for (frames, shape), indices in groups.items():
+        data = numpy.zeros(
+            ((frames - 1) * plan.hopsize + plan.framelength, len(indices)) +
+            shape,
+            dtype=numpy.result_type(*[signals[i] for i in indices])
+        )
+        for j, i in enumerate(indices):
+            data[offset:offset + len(signals[i]), j] = signals[i]
+
+        if plan.dtype is not None:
+            data = _cast(data, plan.dtype)
+
+        output = _process_frames(
+            utils.frame(data, plan.framelength, plan.hopsize),
+            window=plan._window(plan.dtype),
+            halved=plan.halved,
+            transform=plan.transform,
+            transforms=itertools.cycle(plan.transform),
+            padding=plan.padding,
+            workers=workers,
+        )
+        output /= plan.scale
+
+        # channels x signals x frames x bins to bins x frames x signals x
+        # channels
+        output = output.T
+        for j, i in enumerate(indices):
+            results[i] = output[:, :, j]
+
+    if padded:
+        lengths = numpy.array([len(s) for s in signals], dtype=int)
+
+        if not results:
+            return numpy.zeros((0, 0, 0)), lengths
+
+        out = numpy.zeros(
+            (len(results), results[0].shape[0]) +
+            (max(r.shape[1] for r in results),) + results[0].shape[2:],
+            dtype=numpy.result_type(*results)
+        )
+        for i, result in enumerate(results):
+            out[i, :, :result.shape[1]] = result
+
+        if save_settings:
+            out = SpectrogramArray(out, stft_settings=plan.stft_settings())
+
+        return out, lengths
+
+    if save_settings:
+        results = [
+            SpectrogramArray(
+                result, stft_settings=plan.stft_settings(len(signal))
+            )
+            for result, signal in zip(results, signals)
+        ]
+
+    return results
+
+
+def ispectrogram_batch(
+    spectrograms,
+    lengths=None,
+    framelength=None,
+    hopsize=None,
+    overlap=None,
+    centered=None,
+    window=None,
+    halved=None,
+    transform=None,
+    padding=None,
+    workers=None,
+    backend=None,
+):
+    """Calculate the inverse spectrograms of many signals of possibly
+    different length
+
+    Spectrograms with the same number of frames are grouped and transformed
+    in a single batch.
+
+    Parameters
+    ----------
+    spectrograms : list of array_like, array_like
+        A list of spectrograms or a zero-padded tensor of spectrograms, as
+        returned by :func:`spectrogram_batch`.
+    lengths : array_like
+        Length of each output signal. Defaults to infer from the
+        spectrograms. Must be given for padded tensors to remove padded
+        frames.
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, workers, backend :
+        See :func:`stft.ispectrogram`. Defaults to infer from the
+        :code:`stft_settings` of the (first) spectrogram.
+
+    Returns
+    -------
+    data : list of array_like, array_like
+        A list of signals, as returned by :func:`stft.ispectrogram`. If a
+        tensor was given, a tensor of shape :code:`signals x samples` or
+        :code:`signals x samples x channels`, zero-padded to the longest
+        signal.
+
+    """
+    padded = isinstance(spectrograms, numpy.ndarray)
+
+    if len(spectrograms) == 0:
+        return numpy.zeros((0, 0)) if padded else []
+
+    settings = getattr(spectrograms[0], 'stft_settings', None) or {}
+
+    if settings.get('output', 'complex') != 'complex':
+        raise ValueError(
+            "Cannot invert spectrograms of output=%r, they hold no phase" %
+            settings['output']
+        )
+
+    if framelength is None:
+        framelength = settings.get('framelength', 1024)
+    if hopsize is None:
+        hopsize = settings.get('hopsize')
+    if overlap is None:
+        overlap = settings.get('overlap')
+    if centered is None:
+        centered = settings.get('centered', True)
+    if window is None:
+        window = settings.get('window')
+    if halved is None:
+        halved = settings.get('halved', True)
+    if padding is None:
+        padding = settings.get('padding', 0)
+
+    plan = get_plan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=halved,
+        padding=padding,
+        itransform=transform,
+        backend=backend,
+    )
+
+    if lengths is None:
+        lengths = [
+            getattr(s, 'stft_settings', None) and
+            s.stft_settings.get('outlength')
+            for s in spectrograms
+        ]
+
+    # Group spectrograms by their number of frames
+    groups = {}
+    for i, (spectrogram, length) in enumerate(zip(spectrograms, lengths)):
+        if padded and length is not None:
+            frames = plan.frames(length)
+        else:
+            frames = spectrogram.shape[1]
+        groups.setdefault((frames, spectrogram.shape[2:]), []).append(i)
+
+    results = [None] * len(spectrograms)
+    for (frames, shape), indices in groups.items():
+        # bins x frames x channels to channels x signals x frames x bins
+        data = numpy.stack(
+            [numpy.asarray(spectrograms[i])[:, :frames].T for i in indices],
+            axis=-3
+        )
+
+        output = _iprocess_frames(
+            data,
+            # Keep precision of the spectrogram
+            window=plan._window(
+                data.dtype if numpy.iscomplexobj(data) else None
+            ),
+            halved=plan.halved,
+            transform=plan.itransform,
+            transforms=itertools.cycle(plan.itransform),
+            padding=plan.padding,
+            workers=workers,
+        )
+
+        # channels x signals x samples to samples x signals x channels
+        output = utils.overlap_add(output, plan.hopsize)
+        plan._normalize(output, frames=frames)
+        output = output.T
+        if plan.centered:
+            output = utils.center_unpad(output, plan.framelength)
+
+        for j, i in enumerate(indices):
+            results[i] = utils.unpad(output[:, j], lengths[i])
+
+    if padded:
+        out = numpy.zeros(
+            (len(results), max(len(r) for r in results)) +
+            results[0].shape[1:],
+            dtype=numpy.result_type(*results)
+        )
+        for i, result in enumerate(results):
+            out[i, :len(result)] = result
+        return out
+
+    return results
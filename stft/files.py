@@ -0,0 +1,201 @@
+"""
+Module to calculate the spectrograms of many files
+
+The files are distributed across worker processes, each of which reads a
+signal, transforms it using its own cached :class:`stft.STFTPlan` and writes
+the spectrogram straight to the output directory using :func:`stft.save`.
+Only file names are sent between the processes, never signals or
+spectrograms.
+
+"""
+from __future__ import division, absolute_import
+import os
+import tempfile
+import numpy
+from .stft import spectrogram
+from .storage import save
+
+# Arguments of the worker processes, see _init()
+_settings = None
+
+
+def read(path):
+    """Read a signal from a :code:`.wav` or :code:`.npy` file, memory-mapped
+
+    Parameters
+    ----------
+    path : str
+        The file
+
+    Returns
+    -------
+    data : array_like
+        The signal, in the shape of :code:`samples` or :code:`samples x
+        channels`
+
+    """
+    if path.lower().endswith('.wav'):
+        import scipy.io.wavfile
+        return scipy.io.wavfile.read(path, mmap=True)[1]
+    return numpy.load(path, mmap_mode='r')
+
+
+def _output(path, root, outdir):
+    """Name of the output file of :code:`path`, keeping its place below
+    :code:`root`
+
+    """
+    name = os.path.splitext(os.path.relpath(path, root))[0]
+    return os.path.join(outdir, name + '.stft')
+
+
+def _init(settings):
+    global _settings
+    _settings = settings
+
+
+def _process(job):
+    """Transform a single file and atomically move the result in place
+
+    """
+    path, output = job
+    reader, kwargs, layout, dtype = _settings
+
+    data = reader(path)
+    x = spectrogram(data, **kwargs)
+
+    directory = os.path.dirname(output)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        os.close(fd)
+        save(tmp, x, layout=layout, dtype=dtype)
+        os.replace(tmp, output)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+    return path
+
+
+def process_files(
+    paths,
+    outdir,
+    processes=None,
+    reader=read,
+    layout='complex',
+    storage_dtype=None,
+    overwrite=False,
+    progress=None,
+    chunksize=8,
+    **kwargs
+):
+    """Calculate and save the spectrograms of many files
+
+    Each file is written to :code:`outdir` once it is complete, so an
+    interrupted run can be resumed by calling this function again: files
+    whose spectrogram already exists are skipped.
+
+    Parameters
+    ----------
+    paths : list of str
+        The signals. Subdirectories below their common directory are kept in
+        :code:`outdir`.
+    outdir : str
+        Directory to write the spectrograms to, named like the signals with
+        the extension :code:`.stft`, see :func:`stft.load`. Signals that only
+        differ in their extension, e.g. :code:`a.npy` and :code:`a.wav`, are
+        rejected.
+    processes : int
+        Number of worker processes. :code:`1` transforms all files in this
+        process. Defaults to the number of CPUs.
+    reader : callable
+        Function returning the signal of a path. Must be picklable, i.e.
+        defined at the top level of a module. Defaults to :func:`read`.
+    layout, storage_dtype :
+        :code:`layout` and :code:`dtype` of :func:`stft.save`.
+    overwrite : boolean
+        Transform files whose spectrogram already exists. Defaults to
+        :code:`False`.
+    progress : callable
+        Called as :code:`progress(done, total, path)` after each file,
+        including skipped files.
+    chunksize : int
+        Number of files sent to a worker at once. Defaults to :code:`8`.
+    kwargs :
+        Passed to :func:`stft.spectrogram`, e.g. :code:`framelength`. Windows
+        and transforms must be picklable, and registered to be saved, see
+        :func:`stft.types.register_window`.
+
+    Returns
+    -------
+    outputs : list of str
+        The spectrogram files, in the order of :code:`paths`
+
+    Examples
+    --------
+    >>> import numpy, stft, tempfile, os
+    >>> tmp = tempfile.mkdtemp()
+    >>> path = os.path.join(tmp, 'x.npy')
+    >>> numpy.save(path, numpy.random.random(10000))
+    >>> outputs = stft.process_files([path], os.path.join(tmp, 'out'),
+    ...                              processes=1, framelength=512)
+    >>> stft.load(outputs[0]).shape
+    (257, 41)
+
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+
+    root = os.path.commonpath(
+        [os.path.dirname(os.path.abspath(p)) for p in paths]
+    )
+    outputs = [_output(os.path.abspath(p), root, outdir) for p in paths]
+
+    sources = {}
+    for path, output in zip(paths, outputs):
+        other = sources.setdefault(output, path)
+        if os.path.abspath(other) != os.path.abspath(path):
+            raise ValueError(
+                "process_files: %s and %s would both be written to %s" % (
+                    other, path, output
+                )
+            )
+
+    jobs, skipped = [], []
+    for path, output in zip(paths, outputs):
+        if overwrite or not os.path.exists(output):
+            jobs.append((path, output))
+        else:
+            skipped.append(path)
+
+    done = [0]
+
+    def report(path):
+        done[0] += 1
+        if progress is not None:
+            progress(done[0], len(paths), path)
+
+    for path in skipped:
+        report(path)
+
+    settings = (reader, kwargs, layout, storage_dtype)
+
+    if processes is None:
+        processes = os.cpu_count()
+
+    if min(processes, len(jobs)) <= 1:
+        _init(settings)
+        for path in map(_process, jobs):
+            report(path)
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(
+            min(processes, len(jobs)), _init, (settings,)
+        ) as pool:
+            for path in pool.imap_unordered(_process, jobs, chunksize):
+                report(path)
+
+    return outputs
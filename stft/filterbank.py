@@ -0,0 +1,302 @@
+"""
+Module to calculate filterbank features
+
+The magnitude or power spectrum is projected onto mel or constant-Q bands
+while the spectrogram is calculated, block of frames by block of frames, so
+that the complex spectrogram is never held in memory. Filterbank matrices
+are sparse and cached, so that repeated calls for the same settings reuse
+them.
+
+"""
+from __future__ import division, absolute_import
+import functools
+import numpy
+from .stft import get_plan
+
+# Filterbanks kept in the cache, see mel() and constant_q()
+_cachesize = 32
+
+
+def _bins(framelength, padding):
+    """Center frequencies of the bins of a halved spectrum, relative to the
+    samplerate
+
+    """
+    n = framelength * (padding + 1)
+    return numpy.arange(n // 2 + 1) / n
+
+
+def _triangles(frequencies, lower, center, upper):
+    """Matrix of triangular filters of shape :code:`bands x bins`, rising
+    from :code:`lower` to one at :code:`center` and falling to
+    :code:`upper`
+
+    """
+    frequencies = frequencies[numpy.newaxis, :]
+    lower, center, upper = (
+        numpy.asarray(f)[:, numpy.newaxis] for f in (lower, center, upper)
+    )
+
+    rising = (frequencies - lower) / (center - lower)
+    falling = (upper - frequencies) / (upper - center)
+    return numpy.maximum(numpy.minimum(rising, falling), 0)
+
+
+def _sparse(weights):
+    """Store the filters as a sparse float32 matrix, or dense if SciPy is
+    not installed
+
+    """
+    weights = weights.astype(numpy.float32)
+    try:
+        import scipy.sparse
+    except ImportError:
+        return weights
+    return scipy.sparse.csr_matrix(weights)
+
+
+def _issparse(matrix):
+    try:
+        import scipy.sparse
+    except ImportError:
+        return False
+    return scipy.sparse.issparse(matrix)
+
+
+def _hz_to_mel(f):
+    return 2595 * numpy.log10(1 + numpy.asarray(f) / 700)
+
+
+def _mel_to_hz(m):
+    return 700 * (10 ** (numpy.asarray(m) / 2595) - 1)
+
+
+@functools.lru_cache(maxsize=_cachesize)
+def mel(
+    framelength,
+    samplerate,
+    n_bands=128,
+    fmin=0,
+    fmax=None,
+    padding=0,
+):
+    """Mel filterbank
+
+    Triangular filters with a peak of one, spaced evenly on the mel scale,
+    each reaching from the center of the previous to the center of the next
+    filter.
+
+    Parameters
+    ----------
+    framelength : int
+        The signal frame length
+    samplerate : float
+        Samplerate of the signal
+    n_bands : int
+        Number of bands. Defaults to :code:`128`.
+    fmin, fmax : float
+        Lowest and highest frequency in Hz. Default to :code:`0` and half
+        the samplerate.
+    padding : int
+        Zero-padding of the frames, see :func:`stft.spectrogram`.
+
+    Returns
+    -------
+    filterbank : sparse matrix
+        The filters, a float32 matrix of shape :code:`bands x bins`. The
+        matrix is cached and shared by all calls with the same arguments, so
+        it must not be modified; copy it first.
+
+    Examples
+    --------
+    >>> import stft
+    >>> stft.filterbank.mel(1024, 16000, n_bands=40).shape
+    (40, 513)
+
+    """
+    if fmax is None:
+        fmax = samplerate / 2
+
+    if not 0 <= fmin < fmax <= samplerate / 2:
+        raise ValueError("mel: Frequencies must satisfy 0 <= fmin < fmax <= "
+                         "samplerate / 2")
+
+    edges = _mel_to_hz(numpy.linspace(
+        _hz_to_mel(fmin), _hz_to_mel(fmax), n_bands + 2
+    )) / samplerate
+
+    return _sparse(_triangles(
+        _bins(framelength, padding), edges[:-2], edges[1:-1], edges[2:]
+    ))
+
+
+@functools.lru_cache(maxsize=_cachesize)
+def constant_q(
+    framelength,
+    samplerate,
+    n_bands=84,
+    fmin=32.703,
+    bins_per_octave=12,
+    padding=0,
+):
+    """Constant-Q filterbank
+
+    Triangular filters with a peak of one, at center frequencies spaced
+    geometrically by :code:`bins_per_octave`, reaching to the centers of
+    their neighbours. Filters that would be narrower than the spacing of the
+    bins at low frequencies are widened, so that every band covers a bin.
+
+    Parameters
+    ----------
+    framelength : int
+        The signal frame length
+    samplerate : float
+        Samplerate of the signal
+    n_bands : int
+        Number of bands. Defaults to :code:`84`, seven octaves.
+    fmin : float
+        Center frequency of the lowest band in Hz. Defaults to :code:`32.703`,
+        the pitch C1.
+    bins_per_octave : int
+        Number of bands per octave. Defaults to :code:`12`.
+    padding : int
+        Zero-padding of the frames, see :func:`stft.spectrogram`.
+
+    Returns
+    -------
+    filterbank : sparse matrix
+        The filters, a float32 matrix of shape :code:`bands x bins`. The
+        matrix is cached and shared by all calls with the same arguments, so
+        it must not be modified; copy it first.
+
+    Examples
+    --------
+    >>> import stft
+    >>> stft.filterbank.constant_q(4096, 16000, n_bands=48).shape
+    (48, 2049)
+
+    """
+    ratio = 2 ** (1 / bins_per_octave)
+    centers = fmin * ratio ** numpy.arange(n_bands)
+
+    if fmin <= 0 or centers[-1] * ratio > samplerate / 2:
+        raise ValueError("constant_q: All bands must lie between 0 and "
+                         "samplerate / 2")
+
+    centers = centers / samplerate
+    # At least the spacing of the bins
+    spacing = 1 / (framelength * (padding + 1))
+    lower = numpy.minimum(centers / ratio, centers - spacing)
+    upper = numpy.maximum(centers * ratio, centers + spacing)
+
+    return _sparse(_triangles(
+        _bins(framelength, padding), lower, centers, upper
+    ))
+
+
+_filterbanks = {
+    'mel': mel,
+    'constant_q': constant_q,
+}
+
+
+def features(
+    data,
+    samplerate,
+    filterbank='mel',
+    n_bands=None,
+    output='power',
+    framelength=1024,
+    hopsize=None,
+    overlap=None,
+    centered=True,
+    window=None,
+    padding=0,
+    save_settings=True,
+    dtype=numpy.float32,
+    workers=None,
+    backend=None,
+    start=None,
+    stop=None,
+    **kwargs
+):
+    """Calculate the filterbank features of a signal
+
+    Each block of frames is transformed and projected onto the bands of the
+    filterbank right away, so memory is only needed for the features and a
+    single block of the spectrogram.
+
+    Parameters
+    ----------
+    data : array_like
+        The signal to be transformed, see :func:`stft.spectrogram`.
+    samplerate : float
+        Samplerate of the signal
+    filterbank : str, array_like, sparse matrix
+        :code:`'mel'` for :func:`mel` or :code:`'constant_q'` for
+        :func:`constant_q` filters, or a matrix of shape :code:`bands x
+        bins`, which is converted to float32. Defaults to :code:`'mel'`.
+    n_bands : int
+        Number of bands of :code:`'mel'` or :code:`'constant_q'` filters.
+    output : str
+        Project the :code:`'magnitude'` or :code:`'power'` spectrum, or
+        return the projected power in decibels for :code:`'db'`. Defaults to
+        :code:`'power'`.
+    framelength, hopsize, overlap, centered, window, padding, \
+save_settings, workers, backend, start, stop :
+        See :func:`stft.spectrogram`.
+    dtype : numpy.dtype
+        Precision of the transform. Defaults to :code:`numpy.float32`.
+    kwargs :
+        Passed to :func:`mel` or :func:`constant_q`, e.g. :code:`fmin`.
+
+    Returns
+    -------
+    data : array_like
+        The float32 features, formatted as :code:`bands x frames` or
+        :code:`bands x frames x channels`.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> x = numpy.random.random(16000)
+    >>> X = stft.features(x, 16000, n_bands=40)
+    >>> X.shape, X.dtype
+    ((40, 33), dtype('float32'))
+
+    """
+    if isinstance(filterbank, str):
+        try:
+            function = _filterbanks[filterbank]
+        except KeyError:
+            raise ValueError(
+                "Unknown filterbank %s, must be one of %s" % (
+                    filterbank, ', '.join(sorted(_filterbanks))
+                )
+            )
+        if n_bands is not None:
+            kwargs['n_bands'] = n_bands
+        filterbank = function(
+            framelength, samplerate, padding=padding, **kwargs
+        )
+    elif not _issparse(filterbank):
+        filterbank = numpy.asarray(filterbank, dtype=numpy.float32)
+    elif filterbank.dtype != numpy.float32:
+        filterbank = filterbank.astype(numpy.float32)
+
+    plan = get_plan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=True,
+        padding=padding,
+        dtype=dtype,
+        backend=backend,
+    )
+
+    return plan.forward(
+        data, save_settings=save_settings, workers=workers, output=output,
+        start=start, stop=stop, filterbank=filterbank
+    )
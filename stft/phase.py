@@ -0,0 +1,178 @@
+"""
+Module to reconstruct signals from magnitude spectrograms
+
+"""
+from __future__ import division, absolute_import
+import numpy
+from .stft import STFTPlan
+
+
+def griffin_lim(
+    magnitude,
+    n_iter=100,
+    momentum=0.99,
+    tol=None,
+    framelength=None,
+    hopsize=None,
+    overlap=None,
+    centered=None,
+    window=None,
+    halved=None,
+    padding=None,
+    outlength=None,
+    phase=None,
+    seed=None,
+    workers=None,
+):
+    """Reconstruct a signal from its magnitude spectrogram using the (fast)
+    Griffin-Lim algorithm
+
+    The phase is estimated by alternating projections: the current estimate
+    is inverted and transformed again, and its phase is combined with the
+    given magnitude. A single plan is used for all iterations, so that the
+    window and transforms are only set up once, and the signal and
+    spectrogram of each iteration are written into those of the previous
+    ones. All channels are reconstructed at once.
+
+    Parameters
+    ----------
+    magnitude : array_like
+        The magnitude spectrogram, e.g. calculated using
+        :code:`stft.spectrogram(x, output='magnitude')`. May be a 2D matrix
+        for single channel or a 3D tensor for multi channel data. Complex
+        data is reduced to its magnitude.
+    n_iter : int
+        Maximum number of iterations. Defaults to :code:`100`.
+    momentum : float
+        Momentum of the fast Griffin-Lim algorithm. :code:`0` uses the
+        original algorithm. Defaults to :code:`0.99`.
+    tol : float
+        Stop once the spectral convergence, the relative error of the
+        magnitude, improved by less than :code:`tol` in one iteration.
+        Defaults to always running :code:`n_iter` iterations.
+    framelength, hopsize, overlap, centered, window, halved, padding, \
+outlength :
+        See :func:`stft.ispectrogram`. Defaults to infer from the
+        :code:`stft_settings` of :code:`magnitude`.
+    phase : array_like
+        Initial phase estimate in radians. Defaults to a random phase.
+    seed : int
+        Seed of the random initial phase.
+    workers : int
+        Number of threads to split the frames across.
+
+    Returns
+    -------
+    data : array_like
+        The reconstructed signal
+
+    References
+    ----------
+    .. [1] N. Perraudin, P. Balazs and P. L. Soendergaard, "A fast
+       Griffin-Lim algorithm", IEEE WASPAA, 2013.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> x = numpy.sin(numpy.linspace(0, 1000, 10000))
+    >>> X = stft.spectrogram(x, output='magnitude')
+    >>> y = stft.griffin_lim(X, n_iter=50, seed=0)
+    >>> y.shape
+    (10000,)
+
+    """
+    settings = getattr(magnitude, 'stft_settings', None) or {}
+
+    if framelength is None:
+        framelength = settings.get('framelength', 1024)
+    if hopsize is None:
+        hopsize = settings.get('hopsize')
+    if overlap is None:
+        overlap = settings.get('overlap')
+    if centered is None:
+        centered = settings.get('centered', True)
+    if window is None:
+        window = settings.get('window')
+    if halved is None:
+        halved = settings.get('halved', True)
+    if padding is None:
+        padding = settings.get('padding', 0)
+    if outlength is None:
+        outlength = settings.get('outlength')
+    frame_offset = settings.get('frame_offset', 0)
+
+    # Owned by this call, so that it keeps its intermediate arrays
+    plan = STFTPlan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=halved,
+        padding=padding,
+    )
+
+    magnitude = numpy.abs(numpy.asarray(magnitude))
+
+    if phase is None:
+        phase = numpy.random.RandomState(seed).uniform(
+            -numpy.pi, numpy.pi, magnitude.shape
+        )
+
+    # Current estimate of the spectrogram with the given magnitude
+    estimate = magnitude * numpy.exp(1j * numpy.asarray(phase)).astype(
+        numpy.result_type(magnitude.dtype, numpy.complex64)
+    )
+
+    if tol is not None:
+        norm = numpy.linalg.norm(magnitude)
+        error = numpy.inf
+
+    nframes = magnitude.shape[1]
+    extent = outlength
+    if frame_offset or outlength is None:
+        # Iterate on all samples covered by the frames, the result is only
+        # moved to its place in the signal like ispectrogram does at the end
+        extent = (nframes - 1) * plan.hopsize + plan.framelength
+
+    rebuilt = 0
+    signal = spare = None
+    for i in range(n_iter):
+        signal = plan.inverse(
+            estimate, outlength=extent, workers=workers, out=signal
+        )
+
+        # Two spectrogram buffers take turns, momentum needs the previous one
+        previous = rebuilt
+        rebuilt = plan.forward(
+            signal, save_settings=False, workers=workers, stop=nframes,
+            out=spare
+        )
+
+        if tol is not None:
+            last, error = error, numpy.linalg.norm(
+                magnitude - numpy.abs(rebuilt)
+            ) / norm
+            if last - error < tol:
+                break
+
+        if momentum:
+            # Accelerate using the previous projection [1], reusing its
+            # buffer
+            previous *= -momentum / (1 + momentum)
+            previous += rebuilt
+            angles = previous
+        else:
+            angles = rebuilt
+
+        angles /= numpy.abs(angles) + 1e-16
+        numpy.multiply(magnitude, angles, out=estimate)
+
+        if isinstance(previous, numpy.ndarray):
+            spare = previous
+
+    return plan.inverse(
+        estimate, outlength=outlength, workers=workers,
+        frame_offset=frame_offset,
+        out=signal if extent == outlength and not frame_offset else None
+    )
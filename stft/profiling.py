@@ -0,0 +1,245 @@
+"""
+Module to record per-stage timing of transforms
+
+"""
+from __future__ import division, absolute_import
+import time
+import functools
+import threading
+import contextvars
+
+
+# Currently active profiles of this context, innermost last, each paired with
+# the record of the call it is currently timing or None. Worker threads run
+# in a copy of the context of their caller, see propagate().
+_active = contextvars.ContextVar('stft_profiles', default=())
+
+
+def propagate(func):
+    """Make :code:`func` run in a copy of the current context, so that the
+    stages it runs in worker threads are recorded by the active profiles of
+    the caller. Returns :code:`func` itself when profiling is disabled.
+
+    """
+    if not _active.get():
+        return func
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+    return run
+
+
+class _Stage(object):
+    """Records the duration of a stage and the frames and bytes it produced
+
+    """
+    def __init__(self, profiles, name):
+        self.profiles = profiles
+        self.name = name
+        self.frames = 0
+        self.nbytes = 0
+
+    def add(self, frames=0, nbytes=0):
+        self.frames += frames
+        self.nbytes += nbytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        elapsed = time.perf_counter() - self.start
+        for p, record in self.profiles:
+            p._record(record, self.name, elapsed, self.frames, self.nbytes)
+
+
+class _NoStage(object):
+    """Stand-in for :class:`_Stage` when profiling is disabled
+
+    """
+    def add(self, frames=0, nbytes=0):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_nostage = _NoStage()
+
+
+def stage(name):
+    """Context manager timing a stage of a transform. Costs a single check
+    when profiling is disabled.
+
+    Parameters
+    ----------
+    name : str
+        Name of the stage, e.g. :code:`'fft'`
+
+    """
+    profiles = _active.get()
+    if not profiles:
+        return _nostage
+    return _Stage(profiles, name)
+
+
+class _Call(object):
+    """Groups the stages of a single call of a transform
+
+    """
+    def __init__(self, profiles, name, samples, frames):
+        self.profiles = profiles
+        self.record = {
+            'name': name,
+            'samples': samples,
+            'frames': frames,
+            'time': 0.0,
+            'stages': {},
+        }
+
+    def __enter__(self):
+        for p, _ in self.profiles:
+            with p._lock:
+                p._calls.append(self.record)
+        self.token = _active.set(
+            tuple((p, self.record) for p, _ in self.profiles)
+        )
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.record['time'] = time.perf_counter() - self.start
+        _active.reset(self.token)
+        for p, _ in self.profiles:
+            if p.callback is not None:
+                p.callback(self.record)
+
+
+def call(name, samples=0, frames=0):
+    """Context manager grouping the stages of one call of a transform
+
+    Parameters
+    ----------
+    name : str
+        Name of the transform, e.g. :code:`'spectrogram'`
+    samples : int
+        Number of signal samples
+    frames : int
+        Number of frames
+
+    """
+    profiles = _active.get()
+    if not profiles:
+        return _nostage
+    return _Call(profiles, name, samples, frames)
+
+
+def _empty():
+    return {'time': 0.0, 'bytes': 0, 'frames': 0, 'count': 0}
+
+
+class Profile(object):
+    """Per-stage statistics of all transforms run while it is active
+
+    Use :func:`profile` to create and activate a profile. Only transforms
+    run in the thread or task that activated it, or in worker threads they
+    start, are recorded.
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the statistics of each transform call once it has
+        finished.
+
+    """
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._calls = []
+        # Stages run outside of any call, e.g. by the streaming classes
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def _record(self, record, name, elapsed, frames, nbytes):
+        with self._lock:
+            if record is not None:
+                stages = record['stages']
+            else:
+                stages = self._stages
+
+            s = stages.setdefault(name, _empty())
+            s['time'] += elapsed
+            s['bytes'] += nbytes
+            s['frames'] += frames
+            s['count'] += 1
+
+    def as_dict(self):
+        """Export the statistics
+
+        Returns
+        -------
+        stats : dict
+            :code:`calls` is a list of the statistics of each transform call,
+            i.e. its :code:`name`, number of :code:`samples` and
+            :code:`frames`, wall :code:`time` and :code:`stages`. Each stage
+            lists its accumulated wall :code:`time`, the :code:`bytes` it
+            allocated for its results, the number of :code:`frames` it
+            processed and how often it ran (:code:`count`). :code:`stages`
+            holds the same numbers summed over all calls and stages run
+            outside of calls, e.g. by :class:`stft.StreamingSTFT`.
+
+        """
+        totals = {}
+        for stages in [c['stages'] for c in self._calls] + [self._stages]:
+            for name, s in stages.items():
+                t = totals.setdefault(name, _empty())
+                for key in t:
+                    t[key] += s[key]
+
+        return {
+            'calls': [
+                dict(c, stages=dict(
+                    (name, dict(s)) for name, s in c['stages'].items()
+                ))
+                for c in self._calls
+            ],
+            'stages': totals,
+        }
+
+
+class profile(object):
+    """Record per-stage wall time, allocated bytes and frame counts of all
+    transforms run inside this context, in the current thread or task.
+
+    Parameters
+    ----------
+    callback : callable
+        Called with the statistics of each transform call once it has
+        finished, e.g. to push them to a metrics system.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> with stft.profile() as p:
+    ...     x = stft.spectrogram(numpy.random.random(10000))
+    >>> stats = p.as_dict()
+    >>> stats['calls'][0]['name'], stats['calls'][0]['frames']
+    ('spectrogram', 21)
+    >>> sorted(stats['stages'])
+    ['fft', 'frame', 'store', 'window', 'wrap']
+
+    """
+    def __init__(self, callback=None):
+        self.profile = Profile(callback)
+
+    def __enter__(self):
+        self.token = _active.set(_active.get() + ((self.profile, None),))
+        return self.profile
+
+    def __exit__(self, *args):
+        _active.reset(self.token)
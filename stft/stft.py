@@ -3,14 +3,26 @@ Module to transform signals
 
 """
 from __future__ import division, absolute_import
-import scipy
 import numpy
 import math
+import os
 import itertools
-import scipy.interpolate
-import scipy.fft
-from .types import SpectrogramArray
+import functools
+import contextlib
+import threading
+import concurrent.futures
+from .types import SpectrogramArray, STFTSettings, register_window
+from .backends import _real_transforms, _real_itransforms, _out_transforms
+from . import backends
 from . import utils
+from . import profiling
+
+
+# Number of samples to be transformed in one batch
+_blocksize = 2 ** 20
+
+# Output modes of the forward transform
+_outputs = ('complex', 'magnitude', 'power', 'db')
 
 
 def process(
@@ -19,13 +31,17 @@ def process(
     halved,
     transform,
     padding,
+    out=None,
+    workspace=None,
 ):
     """Calculate a windowed transform of a signal
 
     Parameters
     ----------
     data : array_like
-        The signal to be calculated. Must be a 1D array.
+        The signal to be calculated. Must be a 1D array or a stack of frames
+        of shape :code:`... x framelength`, in which case all frames are
+        transformed at once.
     window : array_like
         Tapering window
     halved : boolean
@@ -33,9 +49,17 @@ def process(
         transform of real signals returns a symmetrically mirrored spectrum.
         This additional data is not needed and can be removed.
     transform : callable
-        The transform to be used.
+        The transform to be used. Is applied along the last axis. For halved
+        spectra of real signals, :code:`scipy.fft.fft` and
+        :code:`numpy.fft.fft` are replaced by their :code:`rfft`
+        counterparts.
     padding : int
         Zero-pad signal with x times the number of samples.
+    out : array_like
+        Array the spectrum is written into, if given.
+    workspace : callable
+        Called as :code:`workspace(name, shape, dtype)` to return reusable
+        arrays for intermediate results, instead of allocating them.
 
     Returns
     -------
@@ -44,25 +68,55 @@ def process(
 
     """
 
-    data = data * window
+    frames = _nframes(data)
+
+    if transform not in _real_transforms:
+        # Recognize transforms of backends that have not been used yet
+        backends._load_imported()
+
+    with profiling.stage('window') as stage:
+        if workspace is None:
+            data = data * window
+        else:
+            data = numpy.multiply(data, window, out=workspace(
+                'window', data.shape, numpy.result_type(data, window)
+            ))
+        stage.add(frames, data.nbytes)
+
+    with profiling.stage('fft') as stage:
+        if transform in _real_transforms:
+            # Zero-padding is done by the transform itself
+            n = data.shape[-1] * (padding + 1)
+
+            if halved and not numpy.iscomplexobj(data):
+                transform = _real_transforms[transform]
+                if out is not None and transform in _out_transforms:
+                    result = transform(data, n=n, out=out)
+                else:
+                    result = _store(transform(data, n=n), out)
+                stage.add(frames, result.nbytes)
+                return result
+
+            result = transform(data, n=n)
+        else:
+            if padding > 0:
+                padtuple = [(0, 0)] * data.ndim
+                padtuple[-1] = (0, data.shape[-1] * padding)
+                data = numpy.pad(
+                    data,
+                    pad_width=padtuple,
+                    mode='constant',
+                    constant_values=0
+                )
 
-    if padding > 0:
-        data = numpy.pad(
-            data,
-            pad_width=(
-                0,
-                len(data) * padding
-            ),
-            mode='constant',
-            constant_values=0
-        )
+            result = transform(data)
 
-    result = transform(data)
+        if halved:
+            result = result[..., 0:result.shape[-1] // 2 + 1]
 
-    if halved:
-        result = result[0:result.size // 2 + 1]
+        stage.add(frames, result.nbytes)
 
-    return result
+    return _store(result, out)
 
 
 def iprocess(
@@ -71,13 +125,16 @@ def iprocess(
     halved,
     transform,
     padding,
+    workspace=None,
 ):
     """Calculate the inverse short time fourier transform of a spectrum
 
     Parameters
     ----------
     data : array_like
-        The spectrum to be calculated. Must be a 1D array.
+        The spectrum to be calculated. Must be a 1D array or a stack of
+        spectra of shape :code:`... x bins`, in which case all spectra are
+        transformed at once.
     window : array_like
         Tapering window
     halved : boolean
@@ -86,9 +143,15 @@ def iprocess(
         This additional data is not needed and can be removed. Setting this
         value to :code:`True` will automatically create a mirrored spectrum.
     transform : callable
-        The transform to be used.
+        The transform to be used. Is applied along the last axis. For halved
+        spectra, :code:`scipy.fft.ifft` and :code:`numpy.fft.ifft` are
+        replaced by their :code:`irfft` counterparts.
     padding : int
         Signal before FFT transform was padded with x zeros.
+    workspace : callable
+        Called as :code:`workspace(name, shape, dtype)` to return reusable
+        arrays for intermediate results, instead of allocating them. The
+        returned signal may be such an array.
 
 
     Returns
@@ -97,17 +160,308 @@ def iprocess(
         The signal
 
     """
-    if halved:
-        data = numpy.pad(data, (0, data.shape[0] - 2), 'reflect')
-        start = data.shape[0] // 2 + 1
-        data[start:] = data[start:].conjugate()
+    frames = _nframes(data)
+
+    if transform not in _real_itransforms:
+        # Recognize transforms of backends that have not been used yet
+        backends._load_imported()
+
+    with profiling.stage('fft') as stage:
+        if halved and transform in _real_itransforms:
+            transform = _real_itransforms[transform]
+            n = 2 * (data.shape[-1] - 1)
+
+            if workspace is not None and transform in _out_transforms:
+                output = transform(data, n=n, out=workspace(
+                    'frames', data.shape[:-1] + (n,),
+                    numpy.finfo(data.dtype).dtype
+                ))
+            else:
+                output = transform(data, n=n)
+        else:
+            if halved:
+                padtuple = [(0, 0)] * data.ndim
+                padtuple[-1] = (0, data.shape[-1] - 2)
+                data = numpy.pad(data, padtuple, 'reflect')
+                start = data.shape[-1] // 2 + 1
+                data[..., start:] = data[..., start:].conjugate()
+
+            output = transform(data)
+
+        if padding > 0:
+            output = output[
+                ..., 0:-(output.shape[-1] * padding // (padding + 1))
+            ]
+
+        stage.add(frames, output.nbytes)
+
+    with profiling.stage('window') as stage:
+        if workspace is not None and not numpy.iscomplexobj(output):
+            output *= window
+        else:
+            output = numpy.real(output * window)
+        stage.add(frames, output.nbytes)
+
+    return output
+
+
+def _store(data, out):
+    """Copy :code:`data` into :code:`out`, if given
+
+    """
+    if out is None:
+        return data
+
+    out[...] = data
+    return out
+
+
+def _nframes(data):
+    """Number of frames in a single frame or a stack of frames
+
+    """
+    return data.shape[-2] if data.ndim > 1 else 1
+
+
+def _workers(workers):
+    """Number of threads for :code:`workers`, where :code:`-1` means all
+    CPUs
+
+    """
+    if workers is None:
+        return 1
+    if workers < 0:
+        return os.cpu_count() + 1 + workers
+    return workers
+
+
+@contextlib.contextmanager
+def _pool(workers):
+    """Thread pool of :code:`workers` threads to be shared by all blocks of
+    frames of a transform, or :code:`None` if the frames are processed in
+    the calling thread
+
+    """
+    if _workers(workers) <= 1:
+        yield None
+        return
+
+    with concurrent.futures.ThreadPoolExecutor(_workers(workers)) as pool:
+        yield pool
+
+
+def _map_frames(func, data, workers=None, pool=None):
+    """Apply :code:`func` to a stack of frames of shape :code:`... x frames x
+    n`. If :code:`workers` is given, the frames are split into one chunk per
+    worker which are processed on a thread pool. :code:`workers=-1` uses
+    all CPUs. The chunks are submitted to :code:`pool`, if given, see
+    :func:`_pool`, so that the threads are reused across blocks. The workers
+    run in the context of the caller, so that active profiles record their
+    stages.
+
+    """
+    workers = _workers(workers)
+
+    nframes = data.shape[-2]
+    if workers <= 1 or nframes < 2 * workers:
+        return func(data)
 
-    output = transform(data)
+    bounds = numpy.linspace(0, nframes, workers + 1).astype(int)
+
+    @profiling.propagate
+    def chunk(i):
+        return func(data[..., bounds[i]:bounds[i + 1], :])
+
+    if pool is None:
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            chunks = list(pool.map(chunk, range(workers)))
+    else:
+        chunks = list(pool.map(chunk, range(workers)))
 
-    if padding > 0:
-        output = output[0:-(len(data) * padding // (padding + 1))]
+    return numpy.concatenate(chunks, axis=-2)
 
-    return numpy.real(output * window)
+
+def _process_frames(
+    frames,
+    window,
+    halved,
+    transform,
+    transforms,
+    padding,
+    workers=None,
+    out=None,
+    workspace=None,
+    pool=None,
+):
+    """Apply :func:`process` to a stack of frames of shape :code:`... x frames
+    x framelength`. A single transform is applied to all frames at once, a
+    list of transforms is cycled through frame by frame using the iterator
+    :code:`transforms`. A single transform may be applied to chunks of
+    frames in parallel using :code:`workers` threads of :code:`pool`, see
+    :func:`_map_frames`. The spectra are written into :code:`out`, if
+    given, and :code:`workspace` is passed on to :func:`process` for serial
+    transforms.
+
+    """
+    if len(transform) == 1:
+        if workers is None:
+            return process(
+                frames,
+                window=window,
+                halved=halved,
+                transform=transform[0],
+                padding=padding,
+                out=out,
+                workspace=workspace,
+            )
+
+        return _store(_map_frames(
+            lambda frames: process(
+                frames,
+                window=window,
+                halved=halved,
+                transform=transform[0],
+                padding=padding,
+            ),
+            frames,
+            workers,
+            pool
+        ), out)
+
+    for j in range(frames.shape[-2]):
+        sig = process(
+            frames[..., j, :],
+            window=window,
+            halved=halved,
+            transform=next(transforms),
+            padding=padding,
+        )
+
+        if j == 0:
+            if out is None:
+                out = numpy.zeros(
+                    sig.shape[:-1] + (frames.shape[-2], sig.shape[-1]),
+                    dtype=sig.dtype
+                )
+
+        out[..., j, :] = sig
+
+    return out
+
+
+def _iprocess_frames(
+    data,
+    window,
+    halved,
+    transform,
+    transforms,
+    padding,
+    workers=None,
+    workspace=None,
+    pool=None,
+):
+    """Apply :func:`iprocess` to a stack of spectra of shape :code:`... x
+    frames x bins`. A single transform is applied to all frames at once, a
+    list of transforms is cycled through frame by frame using the iterator
+    :code:`transforms`. A single transform may be applied to chunks of
+    frames in parallel using :code:`workers` threads of :code:`pool`, see
+    :func:`_map_frames`. :code:`workspace` is passed on to :func:`iprocess`
+    for serial transforms.
+
+    """
+    if len(transform) == 1 and workers is None:
+        return iprocess(
+            data,
+            window=window,
+            halved=halved,
+            transform=transform[0],
+            padding=padding,
+            workspace=workspace,
+        )
+
+    if len(transform) == 1:
+        return _map_frames(
+            lambda data: iprocess(
+                data,
+                window=window,
+                halved=halved,
+                transform=transform[0],
+                padding=padding,
+            ),
+            data,
+            workers,
+            pool
+        )
+
+    for j in range(data.shape[-2]):
+        sig = iprocess(
+            data[..., j, :],
+            window=window,
+            halved=halved,
+            transform=next(transforms),
+            padding=padding,
+        )
+
+        if j == 0:
+            frames = numpy.zeros(
+                sig.shape[:-1] + (data.shape[-2], sig.shape[-1]),
+                dtype=sig.dtype
+            )
+
+        frames[..., j, :] = sig
+
+    return frames
+
+
+def _reduce(data, output, out):
+    """Write magnitude, power or decibels of a block of frames into
+    :code:`out`, without allocating temporaries.
+
+    """
+    numpy.abs(data, out=out)
+    if output in ('power', 'db'):
+        numpy.square(out, out=out)
+    if output == 'db':
+        numpy.maximum(out, 1e-10, out=out)
+        numpy.log10(out, out=out)
+        out *= 10
+
+
+def _project(data, filterbank, output, out, workspace=None):
+    """Write the magnitude or power of a block of frames, projected onto
+    the bands of :code:`filterbank`, into :code:`out`
+
+    """
+    spectrum = numpy.abs(data, out=None if workspace is None else workspace(
+        'magnitude', data.shape, data.real.dtype
+    ))
+    if output in ('power', 'db'):
+        numpy.square(spectrum, out=spectrum)
+
+    # ... x bins to bands x ...
+    bands = filterbank.dot(spectrum.reshape(-1, spectrum.shape[-1]).T)
+    out[...] = bands.T.reshape(out.shape)
+
+    if output == 'db':
+        numpy.maximum(out, 1e-10, out=out)
+        numpy.log10(out, out=out)
+        out *= 10
+
+
+def _cast(data, dtype, workspace=None):
+    """Cast a signal to the precision of :code:`dtype`, into an array
+    returned by :code:`workspace` if given
+
+    """
+    precision = numpy.finfo(dtype).dtype
+
+    if numpy.iscomplexobj(data):
+        precision = numpy.result_type(precision, numpy.complex64)
+
+    if workspace is None or data.dtype == precision:
+        return data.astype(precision, copy=False)
+
+    return _store(data, workspace('cast', data.shape, precision))
 
 
 def spectrogram(
@@ -121,6 +475,13 @@ def spectrogram(
     transform=None,
     padding=0,
     save_settings=True,
+    dtype=None,
+    workers=None,
+    output='complex',
+    backend=None,
+    start=None,
+    stop=None,
+    out=None,
 ):
     """Calculate the spectrogram of a signal
 
@@ -145,20 +506,61 @@ def spectrogram(
         the beginning of the signal. Defaults to true.
     window : callable, array_like
         Window to be used for deringing. Can be :code:`False` to disable
-        windowing. Defaults to :code:`scipy.signal.cosine`.
+        windowing. Defaults to :func:`cosine`.
     halved : boolean
         Switch for turning on signal truncation. For real signals, the fourier
         transform of real signals returns a symmetrically mirrored spectrum.
         This additional data is not needed and can be removed. Defaults to
         :code:`True`.
-    transform : callable
-        The transform to be used. Defaults to :code:`scipy.fft.fft`.
+    transform : callable, list of callables
+        The transform to be used. Defaults to the :code:`fft` of the default
+        backend, :code:`scipy.fft.fft`. A single transform is applied to all
+        frames at once along the last axis. If a list of transforms is given,
+        they are cycled through frame by frame.
     padding : int
         Zero-pad signal with x times the number of samples.
     save_settings : boolean
         Save settings used here in attribute :code:`out.stft_settings` so that
         :func:`ispectrogram` can infer these settings without the developer
         having to pass them again.
+    dtype : numpy.dtype
+        Precision of the transform, e.g. :code:`numpy.float32` to calculate a
+        :code:`complex64` spectrogram. The precision is kept by
+        :func:`ispectrogram`. Defaults to double precision.
+    workers : int
+        Number of threads to split the frames across. :code:`-1` uses all
+        CPUs. The result is identical to the serial transform. Defaults to
+        serial processing.
+    output : str
+        :code:`'complex'` returns the complex spectrum, :code:`'magnitude'`
+        its magnitude, :code:`'power'` the squared magnitude and :code:`'db'`
+        the power in decibels, clipped at :code:`-100` dB. Phase-less outputs
+        are calculated frame block by frame block, without ever holding the
+        complex spectrogram in memory, but cannot be inverted using
+        :func:`ispectrogram`. Defaults to :code:`'complex'`.
+    backend : str
+        Name of the FFT backend, e.g. :code:`'numpy'`, used if no
+        :code:`transform` is given. :code:`'auto'` times all available
+        backends once and uses the fastest, see :mod:`stft.backends`.
+        Defaults to :code:`'scipy'`, or :code:`'numpy'` if SciPy is not
+        installed.
+    start, stop : int
+        Range of frames to calculate, e.g. to transform only a few seconds
+        of a long recording. Frame :code:`k` starts at sample :code:`k *
+        hopsize`, or is centered around it if :code:`centered` is set. Only
+        the samples covered by these frames are read. The result keeps its
+        place on the frame grid in :code:`stft_settings.frame_offset`, so
+        that :func:`ispectrogram` reconstructs the corresponding samples.
+        Defaults to all frames.
+    out : array_like
+        Array of the shape and type of the result to write the spectrogram
+        into, e.g. the result of a previous call. Repeated transforms of
+        signals of equal length with the same :class:`STFTPlan` reuse its
+        intermediate arrays, which greatly reduces the memory allocated, if
+        the FFT backend supports writing into existing arrays, like the
+        :code:`'numpy'` backend, and no :code:`workers` are used. Plans of
+        :func:`get_plan`, like the one used by this function, are shared and
+        do not keep intermediate arrays.
 
     Returns
     -------
@@ -177,96 +579,23 @@ def spectrogram(
     stft.stft.process : The function used to transform the data
 
     """
-    outlength = len(data)
-
-    if overlap is None:
-        overlap = 2
-
-    if hopsize is None:
-        hopsize = framelength // overlap
-
-    if halved and numpy.any(numpy.iscomplex(data)):
-        raise ValueError("You cannot treat a complex input signal as real "
-                         "valued. Please set keyword argument halved=False.")
-
-    data = numpy.squeeze(data)
-
-    if transform is None:
-        transform = scipy.fft.fft
-
-    if not isinstance(transform, (list, tuple)):
-        transform = [transform]
-
-    transforms = itertools.cycle(transform)
-
-    if centered:
-        data = utils.center_pad(data, framelength)
-
-    if window is None:
-        window = cosine
-
-    if callable(window):
-        window_array = window(framelength)
-    else:
-        window_array = window
-
-    def traf(data):
-        # Pad input signal so it fits into framelength spec
-        data = utils.pad(data, framelength)
-
-        values = list(enumerate(
-            range(0, len(data) - framelength + hopsize, hopsize)
-        ))
-
-        for j, i in values:
-            sig = process(
-                data[i:i + framelength],
-                window=window_array,
-                halved=halved,
-                transform=next(transforms),
-                padding=padding,
-            ) / (framelength // hopsize // 2)
-
-            if i == 0:
-                output = numpy.zeros(
-                    (sig.shape[0], len(values)), dtype=sig.dtype
-                )
-
-            output[:, j] = sig
-
-        return output
-
-    if data.ndim > 2:
-        raise ValueError("spectrogram: Only 1D or 2D input data allowed")
-    if data.ndim == 1:
-        out = traf(data)
-    elif data.ndim == 2:
-        for i in range(data.shape[1]):
-            tmp = traf(data[:, i])
-
-            if i == 0:
-                out = numpy.empty(
-                    (tmp.shape + (data.shape[1],)), dtype=tmp.dtype
-                )
-            out[:, :, i] = tmp
-
-    if save_settings:
-        out = SpectrogramArray(
-            out,
-            stft_settings={
-                'framelength': framelength,
-                'hopsize': hopsize,
-                'overlap': overlap,
-                'centered': centered,
-                'window': window,
-                'halved': halved,
-                'transform': transform,
-                'padding': padding,
-                'outlength': outlength,
-            }
-        )
-
-    return out
+    plan = get_plan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=halved,
+        transform=transform,
+        padding=padding,
+        dtype=dtype,
+        backend=backend,
+    )
+
+    return plan.forward(
+        data, save_settings=save_settings, workers=workers, output=output,
+        start=start, stop=stop, out=out
+    )
 
 
 def ispectrogram(
@@ -280,6 +609,11 @@ def ispectrogram(
     transform=None,
     padding=None,
     outlength=None,
+    workers=None,
+    backend=None,
+    start=None,
+    stop=None,
+    out=None,
 ):
     """Calculate the inverse spectrogram of a signal
 
@@ -308,8 +642,11 @@ def ispectrogram(
     halved : boolean
         Switch to reconstruct the other halve of the spectrum if the forward
         transform has been truncated. Defaults to to infer from data.
-    transform : callable
-        The transform to be used. Defaults to infer from data.
+    transform : callable, list of callables
+        The transform to be used. Defaults to the :code:`ifft` of the default
+        backend, :code:`scipy.fft.ifft`. A single transform is applied to all
+        frames at once along the last axis. If a list of transforms is given,
+        they are cycled through frame by frame.
     padding : int
         Zero-pad signal with x times the number of samples. Defaults to infer
         from data.
@@ -318,6 +655,22 @@ def ispectrogram(
         did not fit into framelength and input data had to be padded. Not
         setting this value will disable cropping, the output data may be
         longer than expected.
+    workers : int
+        Number of threads to split the frames across. :code:`-1` uses all
+        CPUs. The overlap-add is done afterwards, so the result is identical
+        to the serial transform. Defaults to serial processing.
+    backend : str
+        Name of the FFT backend, used if no :code:`transform` is given.
+        Defaults to the backend of the forward transform.
+    start, stop : int
+        Range of frames to resynthesize, e.g. after editing a few frames.
+        The overlapping neighbouring frames are included in the overlap-add,
+        so that the output equals the corresponding samples of the inverse
+        of all frames. The output starts at the first sample covered by
+        frame :code:`start`. Defaults to all frames.
+    out : array_like
+        Array of the shape and type of the result to write the signal into,
+        e.g. the result of a previous call. See :func:`spectrogram`.
 
     Returns
     -------
@@ -368,7 +721,12 @@ def ispectrogram(
             padding = data.stft_settings['padding']
         if outlength is None:
             outlength = data.stft_settings['outlength']
-    except AttributeError:
+        frame_offset = data.stft_settings.get('frame_offset', 0)
+        transforms = data.stft_settings.get('transform') or ()
+        if backend is None and len(transforms) == 1:
+            backend = backends._name(transforms[0])
+    except (AttributeError, TypeError):
+        frame_offset = 0
         if framelength is None:
             framelength = 1024
         if centered is None:
@@ -383,78 +741,754 @@ def ispectrogram(
             "infer data from array"
         )
 
-    if overlap is None:
-        overlap = 2
+    if (
+        getattr(data, 'stft_settings', None) and
+        data.stft_settings.get('output', 'complex') != 'complex'
+    ):
+        raise ValueError(
+            "Cannot invert a spectrogram of output=%r, it holds no phase" %
+            data.stft_settings['output']
+        )
 
-    if hopsize is None:
-        hopsize = framelength // overlap
+    plan = get_plan(
+        framelength=framelength,
+        hopsize=hopsize,
+        overlap=overlap,
+        centered=centered,
+        window=window,
+        halved=halved,
+        padding=padding,
+        itransform=transform,
+        backend=backend,
+    )
 
-    if window is None:
-        window = cosine
+    return plan.inverse(
+        data, outlength=outlength, workers=workers, frame_offset=frame_offset,
+        start=start, stop=stop, out=out
+    )
 
-    if callable(window):
-        window_array = window(framelength)
-    else:
-        window_array = window
 
-    if transform is None:
-        transform = scipy.fft.ifft
+class STFTPlan(object):
+    """Precomputed settings of a short time fourier transform
 
-    if not isinstance(transform, (list, tuple)):
-        transform = [transform]
+    Settings are resolved and the window is calculated once, so that a plan
+    can be reused for many signals at little setup cost. Plain calls of
+    :func:`spectrogram` and :func:`ispectrogram` reuse plans from a bounded
+    cache, see :func:`get_plan`.
 
-    transforms = itertools.cycle(transform)
+    Parameters
+    ----------
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, dtype :
+        See :func:`spectrogram`.
+    itransform : callable, list of callables
+        The inverse transform to be used. Defaults to the :code:`ifft` of
+        :code:`backend`.
+    backend : str
+        Name of the FFT backend providing the transforms if :code:`transform`
+        or :code:`itransform` are not given, see :mod:`stft.backends`.
+        :code:`'auto'` uses the fastest backend for these settings. Defaults
+        to :code:`'scipy'`, or :code:`'numpy'` if SciPy is not installed.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> plan = stft.STFTPlan(framelength=512)
+    >>> x = numpy.random.random(10000)
+    >>> numpy.allclose(plan.inverse(plan.forward(x), outlength=len(x)), x)
+    True
 
-    def traf(data):
-        i = 0
-        values = range(0, data.shape[1])
-        for j in values:
-            sig = iprocess(
-                data[:, j],
-                window=window_array,
-                halved=halved,
-                transform=next(transforms),
-                padding=padding,
+    """
+    def __init__(
+        self,
+        framelength=1024,
+        hopsize=None,
+        overlap=None,
+        centered=True,
+        window=None,
+        halved=True,
+        transform=None,
+        padding=0,
+        dtype=None,
+        itransform=None,
+        backend=None,
+    ):
+        if overlap is None:
+            overlap = 2
+
+        if hopsize is None:
+            hopsize = framelength // overlap
+
+        if backend == 'auto':
+            backend = backends.autotune(framelength, padding, halved, dtype)
+
+        if transform is None or itransform is None:
+            fft = backends.get_backend(backend or backends.default())
+            if transform is None:
+                transform = fft.fft
+            if itransform is None:
+                itransform = fft.ifft
+        else:
+            # Recognize transforms of backends that have not been used yet
+            backends._load_imported()
+
+        if not isinstance(transform, (list, tuple)):
+            transform = [transform]
+
+        if not isinstance(itransform, (list, tuple)):
+            itransform = [itransform]
+
+        if window is None:
+            window = cosine
+
+        if callable(window):
+            window_array = window(framelength)
+        else:
+            window_array = window
+
+        self.framelength = framelength
+        self.hopsize = hopsize
+        self.overlap = overlap
+        self.centered = centered
+        self.window = window
+        self.halved = halved
+        self.transform = list(transform)
+        self.itransform = list(itransform)
+        self.padding = padding
+        self.dtype = dtype
+        self.backend = backend
+
+        self.window_array = window_array
+        self.scale = max(framelength // hopsize // 2, 1)
+
+        # Window arrays by precision
+        self._windows = {}
+        # Normalization of the inverse, see _normalize()
+        self._norm = None
+        # Intermediate arrays of each thread, see _workspace(). None for
+        # plans shared by get_plan()
+        self._local = threading.local()
+
+    def _window(self, dtype=None):
+        """The window in the precision of :code:`dtype`
+
+        """
+        if dtype is None:
+            return self.window_array
+
+        precision = numpy.finfo(dtype).dtype
+        if precision not in self._windows:
+            self._windows[precision] = numpy.asarray(
+                self.window_array, dtype=precision
             )
+        return self._windows[precision]
+
+    def _workspace(self, name, shape, dtype):
+        """An array for intermediate results, kept by the plan
+
+        Arrays are kept by name and type for each thread, and only grow, so
+        that repeated transforms reuse them instead of allocating memory.
+        Plans shared by :func:`get_plan` allocate new arrays instead. The
+        contents are undefined.
+
+        """
+        if self._local is None:
+            return numpy.empty(shape, dtype=dtype)
+
+        dtype = numpy.dtype(dtype)
+        size = int(numpy.prod(shape))
+
+        buffers = self._local.__dict__
+        buffer = buffers.get((name, dtype))
+        if buffer is None or buffer.size < size:
+            buffer = buffers[(name, dtype)] = numpy.empty(size, dtype=dtype)
+
+        return buffer[:size].reshape(shape)
+
+    def _window_sum(self, frames):
+        """:code:`scale` divided by the sum of the squared windows of
+        :code:`frames` overlapping frames, or zero where no window covers a
+        sample.
+
+        """
+        window = self.window_array
+        if window is False:
+            window = 1
+        window = numpy.broadcast_to(
+            numpy.square(numpy.asarray(window, dtype=float)),
+            (frames, self.framelength)
+        )
 
-            if i == 0:
-                output = numpy.zeros(
-                    framelength + (len(values) - 1) * hopsize,
-                    dtype=sig.dtype
+        wss = utils.overlap_add(window, self.hopsize)
+        tiny = wss > numpy.finfo(wss.dtype).tiny
+        return numpy.divide(
+            self.scale, wss, out=numpy.zeros_like(wss), where=tiny
+        )
+
+    def _normalize(self, data, start=0, frames=None):
+        """Apply the least-squares normalization of the inverse in place
+
+        The overlap-add of windowed frames is divided by the sum of the
+        squared windows, so that any window and hopsize reconstruct the
+        signal. This sum only differs at the first and last
+        :code:`framelength` samples and is periodic in between, so it is
+        calculated once for a few frames and reused for any length.
+
+        Parameters
+        ----------
+        data : array_like
+            Overlap-added samples of shape :code:`... x samples`
+        start : int
+            Index of the first sample of :code:`data`
+        frames : int
+            Total number of frames. Defaults to assuming that more frames
+            follow.
+
+        """
+        hopsize = self.hopsize
+        # Number of frames overlapping a sample
+        m = -(-self.framelength // hopsize)
+
+        if frames is not None and frames <= 2 * m + 1:
+            data *= self._window_sum(frames)[start:start + data.shape[-1]]
+            return
+
+        if self._norm is None:
+            self._norm = self._window_sum(2 * m + 1)
+        norm = self._norm
+
+        stop = start + data.shape[-1]
+        head = m * hopsize
+        if frames is None:
+            tail = stop
+        else:
+            # End of the signal in norm and data
+            end = len(norm)
+            tail = (frames - 1) * hopsize + self.framelength - head
+
+        a, b = start, min(stop, head)
+        if b > a:
+            data[..., :b - start] *= norm[a:b]
+
+        a, b = max(start, head), min(stop, tail)
+        if b > a:
+            # Periodic part, aligned to the first sample
+            period = numpy.roll(
+                norm[head:head + hopsize], -((a - head) % hopsize)
+            )
+            segment = data[..., a - start:b - start]
+            full = (b - a) // hopsize
+            numpy.lib.stride_tricks.as_strided(
+                segment,
+                shape=segment.shape[:-1] + (full, hopsize),
+                strides=segment.strides[:-1] + (
+                    segment.strides[-1] * hopsize, segment.strides[-1]
+                )
+            )[...] *= period
+            segment[..., full * hopsize:] *= period[:b - a - full * hopsize]
+
+        a = max(start, tail)
+        if stop > a:
+            data[..., a - start:] *= norm[
+                end - head - (tail - a):end - head - (tail - stop)
+            ]
+
+    def frames(self, length):
+        """Number of frames of the spectrogram of a signal
+
+        Parameters
+        ----------
+        length : int
+            Length of the signal
+
+        Returns
+        -------
+        frames : int
+            Number of frames
+
+        """
+        if self.centered:
+            length += self.framelength // 2 * 2
+
+        length = utils.padded_length(length, self.framelength, self.hopsize)
+        return (length - self.framelength) // self.hopsize + 1
+
+    def _frames(self, data, start=0, stop=None, workspace=None):
+        """Yield the index of the first frame, relative to :code:`start`,
+        and strided views of up to :code:`_blocksize` samples worth of
+        consecutive frames of a signal, of the frames :code:`start` to
+        :code:`stop`.
+
+        Only frames that overlap the virtual zero-padding at the edges of
+        the signal are copied, into arrays returned by :code:`workspace` if
+        given, all other frames are views of the signal.
+
+        """
+        framelength, hopsize = self.framelength, self.hopsize
+        offset = framelength // 2 if self.centered else 0
+        nframes = self.frames(len(data))
+        if stop is None:
+            stop = nframes
+
+        # Frames that lie entirely inside the signal
+        first = -(-offset // hopsize)
+        last = (len(data) + offset - framelength) // hopsize + 1
+        if last <= first:
+            first = last = nframes
+
+        def samples(start, stop):
+            return (
+                start * hopsize - offset,
+                (stop - 1) * hopsize + framelength - offset,
+            )
+
+        with profiling.stage('frame') as stage:
+            segments = []
+            for a, b, name in [
+                (0, first, 'head'),
+                (first, last, None),
+                (last, nframes, 'tail'),
+            ]:
+                a, b = max(a, start), min(b, stop)
+                if b <= a:
+                    continue
+
+                if name is None:
+                    segment = data[slice(*samples(a, b))]
+                else:
+                    lo, hi = samples(a, b)
+                    segment = utils.padded_slice(
+                        data, lo, hi, out=None if workspace is None else
+                        workspace(
+                            name, (hi - lo,) + data.shape[1:], data.dtype
+                        )
+                    )
+                    stage.add(b - a, segment.nbytes)
+                segments.append((a, b, segment))
+
+        blocksize = max(
+            _blocksize // (
+                framelength * (self.padding + 1) *
+                int(numpy.prod(data.shape[1:]))
+            ),
+            1
+        )
+
+        for a, b, segment in segments:
+            frames = utils.frame(segment, framelength, hopsize)
+            for i in range(0, b - a, blocksize):
+                yield a - start + i, frames[..., i:i + blocksize, :]
+
+    def stft_settings(self, outlength=None, output='complex', frame_offset=0):
+        """The settings to be saved in :code:`SpectrogramArray.stft_settings`
+
+        Parameters
+        ----------
+        outlength : int
+            Length of the signal
+        output : str
+            The output mode, see :func:`spectrogram`
+        frame_offset : int
+            Index of the first frame
+
+        Returns
+        -------
+        settings : STFTSettings
+            The settings
+
+        """
+        return STFTSettings(
+            framelength=self.framelength,
+            hopsize=self.hopsize,
+            overlap=self.overlap,
+            centered=self.centered,
+            window=self.window,
+            halved=self.halved,
+            transform=self.transform,
+            padding=self.padding,
+            outlength=outlength,
+            output=output,
+            frame_offset=frame_offset,
+        )
+
+    def forward(self, data, save_settings=True, workers=None,
+                output='complex', start=None, stop=None, out=None,
+                filterbank=None):
+        """Calculate the spectrogram of a signal
+
+        Parameters
+        ----------
+        data : array_like
+            The signal to be transformed, see :func:`spectrogram`.
+        save_settings : boolean
+            Save settings in attribute :code:`out.stft_settings`.
+        workers : int
+            Number of threads to split the frames across.
+        output : str
+            The output mode, see :func:`spectrogram`.
+        start, stop : int
+            The range of frames, see :func:`spectrogram`.
+        out : array_like
+            Array to write the spectrogram into, see :func:`spectrogram`.
+        filterbank : array_like, sparse matrix
+            Matrix of shape :code:`bands x bins` the magnitude or power of
+            each block of frames is projected onto, before it is stored, see
+            :mod:`stft.filterbank`. The spectrogram then has :code:`bands`
+            rows of the type of the matrix. Requires a phase-less
+            :code:`output`.
+
+        Returns
+        -------
+        data : array_like
+            The spectrogram, see :func:`spectrogram`.
+
+        """
+        start, stop, _ = slice(start, stop).indices(self.frames(len(data)))
+
+        with profiling.call(
+            'spectrogram', samples=len(data), frames=max(stop - start, 0)
+        ), _pool(workers) as pool:
+            return self._forward(
+                data, save_settings, workers, output, start, stop, out,
+                filterbank, pool
+            )
+
+    def _forward(self, data, save_settings, workers, output, start, stop,
+                 out, filterbank, pool):
+        if output not in _outputs:
+            raise ValueError("Unknown output %s, must be one of %s" % (
+                output, ', '.join(_outputs)
+            ))
+
+        bins = self.framelength * (self.padding + 1)
+        if self.halved:
+            bins = bins // 2 + 1
+
+        if filterbank is not None:
+            if output == 'complex':
+                raise ValueError("spectrogram: A filterbank requires "
+                                 "output='magnitude', 'power' or 'db'")
+            if filterbank.shape[1] != bins:
+                raise ValueError(
+                    "spectrogram: filterbank must have %d columns, not %d" % (
+                        bins, filterbank.shape[1]
+                    )
                 )
 
-            output[i:i + framelength] += sig
+        if stop <= start:
+            raise ValueError("spectrogram: Empty range of frames")
+
+        outlength = len(data)
+
+        data = numpy.asarray(data)
+
+        if (
+            self.halved and
+            numpy.iscomplexobj(data) and
+            numpy.any(data.imag)
+        ):
+            raise ValueError("You cannot treat a complex input signal as "
+                             "real valued. Please set keyword argument "
+                             "halved=False.")
+
+        data = numpy.squeeze(data)
+
+        if data.ndim > 2:
+            raise ValueError("spectrogram: Only 1D or 2D input data allowed")
+
+        window = self._window(self.dtype)
+        transforms = itertools.cycle(self.transform)
+
+        if out is None:
+            workspace = buf = None
+        else:
+            shape = (
+                bins if filterbank is None else filterbank.shape[0],
+                stop - start
+            ) + data.shape[1:]
+            if out.shape != shape:
+                raise ValueError(
+                    "spectrogram: out must have shape %s, not %s" % (
+                        shape, out.shape
+                    )
+                )
+            if output == 'complex' and not numpy.iscomplexobj(out):
+                raise ValueError("spectrogram: out must be complex")
+
+            workspace = self._workspace
+            # bins x frames x channels to channels x frames x bins
+            buf = out.T
+
+        for i, frames in self._frames(data, start, stop, workspace):
+            if self.dtype is not None:
+                with profiling.stage('cast') as stage:
+                    frames = _cast(frames, self.dtype, workspace)
+                    stage.add(frames.shape[-2], frames.nbytes)
+
+            block = None
+            if out is not None:
+                block = buf[..., i:i + frames.shape[-2], :]
+                if output != 'complex':
+                    # Complex spectra are reduced into the output
+                    block = workspace('spectrum', block.shape[:-1] + (bins,), (
+                        numpy.result_type(frames, window, numpy.complex64)
+                    ))
+
+            # All channels are transformed at once
+            sig = _process_frames(
+                frames,
+                window=window,
+                halved=self.halved,
+                transform=self.transform,
+                transforms=transforms,
+                padding=self.padding,
+                workers=workers,
+                out=block,
+                workspace=workspace,
+                pool=pool,
+            )
 
-            i += hopsize
+            with profiling.stage('store') as stage:
+                sig /= self.scale
+
+                if buf is None and filterbank is not None:
+                    buf = numpy.empty(
+                        sig.shape[:-2] + (stop - start, filterbank.shape[0]),
+                        dtype=filterbank.dtype
+                    )
+                    stage.add(0, buf.nbytes)
+                elif buf is None:
+                    buf = numpy.empty(
+                        sig.shape[:-2] + (stop - start, sig.shape[-1]),
+                        dtype=(
+                            sig.dtype if output == 'complex' else
+                            sig.real.dtype
+                        )
+                    )
+                    stage.add(0, buf.nbytes)
+
+                if output == 'complex':
+                    if block is None:
+                        buf[..., i:i + sig.shape[-2], :] = sig
+                elif filterbank is not None:
+                    _project(
+                        sig, filterbank, output,
+                        buf[..., i:i + sig.shape[-2], :], workspace
+                    )
+                else:
+                    _reduce(sig, output, buf[..., i:i + sig.shape[-2], :])
+                stage.add(sig.shape[-2])
+
+        if out is None:
+            # channels x frames x bins to bins x frames x channels
+            out = buf.T
+
+        if save_settings:
+            with profiling.stage('wrap'):
+                out = SpectrogramArray(
+                    out,
+                    stft_settings=self.stft_settings(
+                        outlength, output, frame_offset=start
+                    )
+                )
 
-        return output
+        return out
+
+    def inverse(self, data, outlength=None, workers=None, frame_offset=0,
+                start=None, stop=None, out=None):
+        """Calculate the inverse spectrogram of a signal
+
+        Parameters
+        ----------
+        data : array_like
+            The spectrogram to be inverted, see :func:`ispectrogram`.
+        outlength : int
+            Crop output signal to length.
+        workers : int
+            Number of threads to split the frames across.
+        frame_offset : int
+            Index of the first frame in the spectrogram of the entire signal,
+            if :code:`data` is a slice of frames. The output then starts at
+            the corresponding sample of the signal.
+        start, stop : int
+            The range of frames, see :func:`ispectrogram`.
+        out : array_like
+            Array to write the signal into, see :func:`ispectrogram`.
+
+        Returns
+        -------
+        data : array_like
+            The signal, see :func:`ispectrogram`.
+
+        """
+        with profiling.call(
+            'ispectrogram',
+            samples=outlength or 0,
+            frames=data.shape[1] if data.ndim > 1 else 0
+        ):
+            return self._inverse(
+                data, outlength, workers, frame_offset, start, stop, out
+            )
 
-    if data.ndim == 2:
-        out = traf(data)
-    elif data.ndim == 3:
-        for i in range(data.shape[2]):
-            tmp = traf(data[:, :, i])
+    def _inverse(self, data, outlength, workers, frame_offset, start, stop,
+                 out):
+        if data.ndim not in (2, 3):
+            raise ValueError("ispectrogram: Only 2D or 3D input data allowed")
+
+        nframes = data.shape[1]
+        start, stop, _ = slice(start, stop).indices(nframes)
+        if stop <= start and nframes:
+            raise ValueError("ispectrogram: Empty range of frames")
+
+        partial = start > 0 or stop < nframes
+        if partial:
+            # Include all frames overlapping the range
+            overlapping = -(-self.framelength // self.hopsize) - 1
+            first = max(start - overlapping, 0)
+            data = numpy.asarray(data)[
+                :, first:min(stop + overlapping, nframes)
+            ]
+
+        # Keep precision of the spectrogram
+        window = self._window(
+            data.dtype if numpy.iscomplexobj(data) else None
+        )
 
-            if i == 0:
-                out = numpy.empty(
-                    (tmp.shape + (data.shape[2],)), dtype=tmp.dtype
+        workspace = None if out is None else self._workspace
+
+        # bins x frames x channels to channels x frames x bins
+        frames = _iprocess_frames(
+            data.T,
+            window=window,
+            halved=self.halved,
+            transform=self.itransform,
+            transforms=itertools.cycle(self.itransform),
+            padding=self.padding,
+            workers=workers,
+            workspace=workspace,
+        )
+
+        # All channels are overlap-added at once, channels x samples to
+        # samples x channels
+        with profiling.stage('overlap_add') as stage:
+            slabs = frames.shape[:-2] + (
+                frames.shape[-2] + -(-frames.shape[-1] // self.hopsize),
+                self.hopsize
+            )
+            signal = utils.overlap_add(
+                frames, self.hopsize, out=None if workspace is None else
+                workspace('overlap_add', slabs, frames.dtype)
+            )
+            if partial:
+                self._normalize(
+                    signal, start=first * self.hopsize, frames=nframes
                 )
-            out[:, i] = tmp
-    else:
-        raise ValueError("ispectrogram: Only 2D or 3D input data allowed")
+                signal = signal[
+                    ...,
+                    (start - first) * self.hopsize:
+                    (stop - 1 - first) * self.hopsize + self.framelength
+                ]
+            else:
+                self._normalize(signal, frames=nframes)
+            signal = signal.T
+            stage.add(frames.shape[-2], signal.nbytes)
+
+        frame_offset += start
+        if frame_offset or partial:
+            # Index of the first sample in the signal
+            start = frame_offset * self.hopsize
+            if self.centered:
+                start -= self.framelength // 2
+
+            signal = signal[max(-start, 0):]
+            if outlength is not None:
+                outlength = max(outlength - max(start, 0), 0)
+        elif self.centered:
+            signal = utils.center_unpad(signal, self.framelength)
+
+        signal = utils.unpad(signal, outlength)
+
+        if out is not None:
+            if out.shape != signal.shape:
+                raise ValueError(
+                    "ispectrogram: out must have shape %s, not %s" % (
+                        signal.shape, out.shape
+                    )
+                )
+            out[...] = signal
+            return out
 
-    if centered:
-        out = utils.center_unpad(out, framelength)
+        return signal
 
-    return utils.unpad(out, outlength)
+
+@functools.lru_cache(maxsize=64)
+def _cached_plan(*args):
+    plan = STFTPlan(*args)
+    # Shared plans would pin the memory of their intermediate arrays
+    plan._local = None
+    return plan
+
+
+def get_plan(
+    framelength=1024,
+    hopsize=None,
+    overlap=None,
+    centered=True,
+    window=None,
+    halved=True,
+    transform=None,
+    padding=0,
+    dtype=None,
+    itransform=None,
+    backend=None,
+):
+    """Return a :class:`STFTPlan` for the given settings
+
+    Plans are kept in a bounded LRU cache, so repeated calls with the same
+    settings return the same plan. Settings that cannot be hashed, e.g.
+    window arrays, always create a new plan. Cached plans do not keep
+    intermediate arrays between transforms into :code:`out`, create a
+    :class:`STFTPlan` for that.
+
+    Parameters
+    ----------
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, dtype, itransform, backend :
+        See :class:`STFTPlan`.
+
+    Returns
+    -------
+    plan : STFTPlan
+        The plan
+
+    """
+    if isinstance(transform, list):
+        transform = tuple(transform)
+
+    if isinstance(itransform, list):
+        itransform = tuple(itransform)
+
+    if dtype is not None:
+        dtype = numpy.dtype(dtype)
+
+    args = (
+        framelength, hopsize, overlap, centered, window, halved, transform,
+        padding, dtype, itransform, backend
+    )
+
+    try:
+        hash(args)
+    except TypeError:
+        return STFTPlan(*args)
+
+    return _cached_plan(*args)
 
 
 def cosine(M):
     """Gernerate a halfcosine window of given length
 
-    Uses :code:`scipy.signal.cosine` by default. However since this window
-    function has only recently been merged into mainline SciPy, a fallback
-    calculation is in place.
+    Equals :code:`scipy.signal.windows.cosine`, but is calculated using NumPy
+    so that SciPy does not need to be imported.
 
     Parameters
     ----------
@@ -467,8 +1501,7 @@ def cosine(M):
         The window function
 
     """
-    try:
-        import scipy.signal
-        return scipy.signal.cosine(M)
-    except AttributeError:
-        return numpy.sin(numpy.pi / M * (numpy.arange(0, M) + .5))
+    return numpy.sin(numpy.pi / M * (numpy.arange(0, M) + .5))
+
+
+register_window('cosine', cosine)
@@ -0,0 +1,315 @@
+"""
+Module to store spectrograms on disk
+
+Spectrograms are stored in a simple container: a short JSON header holding
+the shape, layout and :code:`stft_settings`, followed by the raw data in
+frame-major order. Every range of frames is therefore a contiguous region of
+the file that can be memory-mapped and read on its own.
+
+"""
+from __future__ import division, absolute_import
+import json
+import struct
+import numpy
+from .types import SpectrogramArray, STFTSettings
+
+_magic = b'\x93STFT'
+_version = 1
+# Data is aligned to this many bytes
+_alignment = 64
+
+LAYOUTS = ('complex', 'magnitude', 'polar')
+
+
+def _record_dtype(layout, dtype, phase_bits):
+    dtype = numpy.dtype(dtype).newbyteorder('<')
+    if dtype.kind != 'f':
+        raise ValueError("Storage dtype must be a float type, not %s" % dtype)
+
+    if layout == 'complex':
+        if dtype.itemsize == 2:
+            # There is no half precision complex type
+            return numpy.dtype([('real', dtype), ('imag', dtype)])
+        return numpy.dtype('<c%d' % (2 * dtype.itemsize))
+    elif layout == 'magnitude':
+        return dtype
+    elif layout == 'polar':
+        if phase_bits not in (8, 16):
+            raise ValueError("phase_bits must be 8 or 16")
+        return numpy.dtype([
+            ('magnitude', dtype), ('phase', '<u%d' % (phase_bits // 8))
+        ])
+    raise ValueError(
+        "Unknown layout %s, must be one of %s" % (layout, ', '.join(LAYOUTS))
+    )
+
+
+def _encode(data, layout, record, phase_bits):
+    out = numpy.empty(data.shape, dtype=record)
+    if layout == 'complex':
+        if record.names:
+            out['real'] = data.real
+            out['imag'] = data.imag
+        else:
+            out[...] = data
+    elif layout == 'magnitude':
+        out[...] = numpy.abs(data) if numpy.iscomplexobj(data) else data
+    elif layout == 'polar':
+        steps = 2 ** phase_bits
+        out['magnitude'] = numpy.abs(data)
+        out['phase'] = numpy.round(
+            numpy.angle(data) * (steps / (2 * numpy.pi))
+        ).astype(numpy.int64) % steps
+    return out
+
+
+def _decode(data, layout, phase_bits):
+    if layout == 'complex':
+        if data.dtype.names:
+            return data['real'] + 1j * data['imag'].astype(numpy.complex64)
+        return numpy.array(data)
+    elif layout == 'magnitude':
+        return numpy.array(data)
+    elif layout == 'polar':
+        phase = data['phase'] * (2 * numpy.pi / 2 ** phase_bits)
+        return data['magnitude'] * numpy.exp(
+            1j * phase.astype(data['magnitude'].dtype)
+        )
+
+
+def save(
+    path,
+    data,
+    layout='complex',
+    dtype=None,
+    phase_bits=16,
+    chunksize=256,
+):
+    """Save a spectrogram and its settings
+
+    Parameters
+    ----------
+    path : str
+        The file to write
+    data : SpectrogramArray
+        The spectrogram, in the shape of :code:`bins x frames` or
+        :code:`bins x frames x channels`.
+    layout : str
+        :code:`'complex'` stores the complex values, :code:`'magnitude'`
+        only their magnitude and :code:`'polar'` the magnitude and the phase
+        quantized to :code:`phase_bits`. Defaults to :code:`'complex'`.
+        Real valued data, e.g. calculated using :code:`output='power'`, is
+        always stored as is in the :code:`'magnitude'` layout.
+    dtype : numpy.dtype
+        Float type used to store the values, e.g. :code:`numpy.float16` or
+        :code:`numpy.float32`. Defaults to the precision of :code:`data`.
+    phase_bits : int
+        Number of bits of the quantized phase in the :code:`'polar'` layout,
+        either :code:`8` or :code:`16`. Defaults to :code:`16`.
+    chunksize : int
+        Number of frames converted and written at once. Defaults to
+        :code:`256`.
+
+    Examples
+    --------
+    >>> import numpy, stft, tempfile, os
+    >>> x = stft.spectrogram(numpy.random.random(10000))
+    >>> path = os.path.join(tempfile.mkdtemp(), 'x.stft')
+    >>> stft.save(path, x, dtype=numpy.float32)
+    >>> y = stft.load(path, start=5, stop=10)
+    >>> y.shape, y.stft_settings.frame_offset
+    ((513, 5), 5)
+
+    """
+    settings = getattr(data, 'stft_settings', None)
+    data = numpy.asarray(data)
+
+    if data.ndim < 2:
+        raise ValueError("save: Only 2D or 3D spectrograms allowed")
+
+    if dtype is None:
+        dtype = data.real.dtype
+        if dtype.kind != 'f':
+            dtype = numpy.float64
+
+    if not numpy.iscomplexobj(data):
+        layout = 'magnitude'
+
+    record = _record_dtype(layout, dtype, phase_bits)
+
+    if settings is not None:
+        if not isinstance(settings, STFTSettings):
+            settings = STFTSettings(**settings)
+        if layout == 'magnitude' and settings.output == 'complex':
+            settings = settings.replace(output='magnitude')
+        settings = settings.to_dict()
+
+    try:
+        header = json.dumps({
+            'version': _version,
+            'shape': list(data.shape),
+            'layout': layout,
+            'dtype': numpy.dtype(dtype).newbyteorder('<').str,
+            'phase_bits': phase_bits,
+            'stft_settings': settings,
+        }).encode('utf-8')
+    except TypeError:
+        raise ValueError("save: Windows and transforms must be arrays or "
+                         "registered using stft.types.register_window and "
+                         "stft.types.register_transform")
+
+    offset = len(_magic) + 4 + len(header)
+    header += b' ' * (-offset % _alignment)
+
+    with open(path, 'wb') as f:
+        f.write(_magic)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        for start in range(0, data.shape[1], chunksize):
+            # bins x frames x channels to frames x bins x channels
+            chunk = numpy.moveaxis(data[:, start:start + chunksize], 1, 0)
+            f.write(_encode(chunk, layout, record, phase_bits).tobytes())
+
+
+class SpectrogramFile(object):
+    """A spectrogram stored using :func:`save`, memory-mapped so that only
+    the frames actually read are loaded from disk.
+
+    Parameters
+    ----------
+    path : str
+        The file to read
+
+    Attributes
+    ----------
+    shape : tuple
+        Shape of the stored spectrogram
+    layout : str
+        The layout, see :func:`save`
+    stft_settings : STFTSettings
+        The stored settings, or :code:`None`
+
+    Examples
+    --------
+    >>> import numpy, stft, tempfile, os
+    >>> path = os.path.join(tempfile.mkdtemp(), 'x.stft')
+    >>> stft.save(path, stft.spectrogram(numpy.random.random(10000)))
+    >>> f = stft.storage.SpectrogramFile(path)
+    >>> f.shape, f[:, 3:5].shape
+    ((513, 21), (513, 2))
+
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            if f.read(len(_magic)) != _magic:
+                raise ValueError("%s is not a spectrogram file" % path)
+            length, = struct.unpack('<I', f.read(4))
+            header = json.loads(f.read(length).decode('utf-8'))
+
+        if header['version'] > _version:
+            raise ValueError("%s has unsupported version %d" % (
+                path, header['version']
+            ))
+
+        self.shape = tuple(header['shape'])
+        self.layout = header['layout']
+        self.phase_bits = header['phase_bits']
+
+        settings = header['stft_settings']
+        if settings is not None:
+            settings = STFTSettings.from_dict(settings)
+        self.stft_settings = settings
+
+        record = _record_dtype(self.layout, header['dtype'], self.phase_bits)
+        # frames x bins x channels
+        shape = (self.shape[1], self.shape[0]) + self.shape[2:]
+
+        if 0 in shape:
+            # Empty files cannot be memory-mapped
+            self._data = numpy.zeros(shape, dtype=record)
+        else:
+            self._data = numpy.memmap(
+                path,
+                dtype=record,
+                mode='r',
+                offset=len(_magic) + 4 + length,
+                shape=shape,
+            )
+
+    @property
+    def frames(self):
+        return self.shape[1]
+
+    def read(self, start=None, stop=None):
+        """Read a range of frames
+
+        Parameters
+        ----------
+        start, stop : int
+            The range of frames. Defaults to all frames.
+
+        Returns
+        -------
+        data : SpectrogramArray
+            The frames, with :code:`stft_settings.frame_offset` set to
+            :code:`start`.
+
+        """
+        start, stop, _ = slice(start, stop).indices(self.frames)
+        stop = max(start, stop)
+
+        data = numpy.moveaxis(
+            _decode(self._data[start:stop], self.layout, self.phase_bits),
+            0, 1
+        )
+
+        settings = self.stft_settings
+        if settings is not None and start:
+            settings = settings.replace(
+                frame_offset=settings.frame_offset + start
+            )
+
+        return SpectrogramArray(data, stft_settings=settings)
+
+    def __getitem__(self, key):
+        """Read frames using a slice along the second axis, i.e.
+        :code:`f[:, start:stop]`
+
+        """
+        if (
+            type(key) is not tuple or
+            len(key) != 2 or
+            key[0] != slice(None) or
+            type(key[1]) is not slice or
+            key[1].step not in (None, 1)
+        ):
+            raise IndexError("SpectrogramFile only supports reading frame "
+                             "ranges, e.g. f[:, start:stop]")
+        return self.read(key[1].start, key[1].stop)
+
+    def __len__(self):
+        return self.shape[0]
+
+
+def load(path, start=None, stop=None):
+    """Load a spectrogram saved using :func:`save`
+
+    Only the requested frames are read from disk.
+
+    Parameters
+    ----------
+    path : str
+        The file to read
+    start, stop : int
+        The range of frames. Defaults to all frames.
+
+    Returns
+    -------
+    data : SpectrogramArray
+        The spectrogram, in the shape of :code:`bins x frames` or
+        :code:`bins x frames x channels`. Complex for the :code:`'complex'`
+        and :code:`'polar'` layouts, real for the :code:`'magnitude'`
+        layout.
+
+    """
+    return SpectrogramFile(path).read(start, stop)
@@ -0,0 +1,788 @@
+"""
+Module to transform signals block by block
+
+"""
+from __future__ import division, absolute_import
+import numpy
+import itertools
+from .types import SpectrogramArray
+from .stft import get_plan, _cast, _process_frames, _iprocess_frames
+from . import utils
+from . import profiling
+
+
+class StreamingSTFT(object):
+    """Calculate the spectrogram of a signal that arrives in blocks of
+    arbitrary size.
+
+    The last :code:`framelength - hopsize` samples are kept between calls, so
+    that frames are returned as soon as they are complete. Concatenating all
+    outputs of :meth:`process` and :meth:`flush` along the frames axis
+    yields the same result as :func:`stft.spectrogram` of the entire signal.
+
+    Parameters
+    ----------
+    framelength : int
+        The signal frame length. Defaults to :code:`1024`.
+    hopsize : int
+        The signal frame hopsize. Defaults to :code:`None`. Setting this
+        value will override :code:`overlap`.
+    overlap : int
+        The signal frame overlap coefficient. Value :code:`x` means
+        :code:`1/x` overlap. Defaults to :code:`2`.
+    centered : boolean
+        Pad input signal so that the first and last window are centered around
+        the beginning of the signal. Defaults to true.
+    window : callable, array_like
+        Window to be used for deringing. Defaults to
+        :func:`stft.stft.cosine`.
+    halved : boolean
+        Switch for turning on signal truncation. Defaults to :code:`True`.
+    transform : callable, list of callables
+        The transform to be used. Defaults to the default backend, see
+        :mod:`stft.backends`.
+    padding : int
+        Zero-pad signal with x times the number of samples.
+    dtype : numpy.dtype
+        Precision of the transform. Defaults to double precision.
+    outlength : int
+        Length of the entire signal, if known in advance. Otherwise it is
+        known once :meth:`flush` has been called.
+    backend : str
+        Name of the FFT backend, see :func:`stft.spectrogram`.
+
+    Attributes
+    ----------
+    plan : STFTPlan
+        The plan holding the resolved settings.
+    stft_settings : STFTSettings
+        The settings used here. Each returned block carries a copy with its
+        :code:`frame_offset`.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> s = stft.StreamingSTFT(framelength=512)
+    >>> blocks = [s.process(b) for b in numpy.split(numpy.ones(2048), 4)]
+    >>> blocks.append(s.flush())
+    >>> numpy.concatenate(blocks, axis=1).shape
+    (257, 9)
+
+    """
+    def __init__(
+        self,
+        framelength=1024,
+        hopsize=None,
+        overlap=None,
+        centered=True,
+        window=None,
+        halved=True,
+        transform=None,
+        padding=0,
+        dtype=None,
+        outlength=None,
+        backend=None,
+    ):
+        self.plan = get_plan(
+            framelength=framelength,
+            hopsize=hopsize,
+            overlap=overlap,
+            centered=centered,
+            window=window,
+            halved=halved,
+            transform=transform,
+            padding=padding,
+            dtype=dtype,
+            backend=backend,
+        )
+        self.transforms = itertools.cycle(self.plan.transform)
+        self.stft_settings = self.plan.stft_settings(outlength)
+
+        # Samples not yet consumed by a complete frame
+        self.buffer = None
+        # Samples to drop before the next frame, if hopsize > framelength
+        self.skip = 0
+        # Number of input samples seen so far
+        self.length = 0
+        # Number of frames returned so far
+        self.frames = 0
+
+    def _frames(self, data):
+        data = numpy.asarray(data)
+
+        plan = self.plan
+
+        if plan.halved and numpy.any(numpy.iscomplex(data)):
+            raise ValueError("You cannot treat a complex input signal as "
+                             "real valued. Please set keyword argument "
+                             "halved=False.")
+
+        if plan.dtype is not None:
+            data = _cast(data, plan.dtype)
+
+        if self.buffer is None:
+            self.buffer = numpy.zeros(
+                (plan.framelength // 2 if plan.centered else 0,) +
+                data.shape[1:],
+                dtype=data.dtype
+            )
+
+        if self.skip:
+            skipped = min(self.skip, len(data))
+            self.skip -= skipped
+            data = data[skipped:]
+
+        buffer = numpy.concatenate((self.buffer, data))
+
+        if len(buffer) < plan.framelength:
+            self.buffer = buffer
+            return numpy.zeros(
+                buffer.shape[1:][::-1] + (0, plan.framelength),
+                dtype=buffer.dtype
+            )
+
+        frames = utils.frame(buffer, plan.framelength, plan.hopsize)
+        consumed = frames.shape[-2] * plan.hopsize
+        self.buffer = buffer[consumed:]
+        # The next frame may start past the end of the buffer
+        self.skip = max(consumed - len(buffer), 0)
+        return frames
+
+    def _schedule(self, frames):
+        """Advance the state past a stack of frames, and return the
+        arguments of :meth:`_compute` transforming them
+
+        """
+        transforms = self.transforms
+        if len(self.plan.transform) > 1:
+            # Fix the transforms of these frames
+            transforms = iter([
+                next(self.transforms) for _ in range(frames.shape[-2])
+            ])
+
+        settings = self.stft_settings.replace(frame_offset=self.frames)
+        self.frames += frames.shape[-2]
+
+        return frames, transforms, settings
+
+    def _compute(self, frames, transforms, settings):
+        """Transform a stack of frames. Does not depend on the state, so it
+        may run concurrently with :meth:`_frames` and :meth:`_schedule`.
+
+        """
+        plan = self.plan
+
+        if frames.shape[-2] == 0:
+            output = numpy.zeros(
+                frames.shape[:-1] + (
+                    plan.framelength * (plan.padding + 1) // 2 + 1
+                    if plan.halved else
+                    plan.framelength * (plan.padding + 1),
+                ),
+                dtype=numpy.result_type(frames.dtype, numpy.complex64)
+            )
+        else:
+            output = _process_frames(
+                frames,
+                window=plan._window(plan.dtype),
+                halved=plan.halved,
+                transform=plan.transform,
+                transforms=transforms,
+                padding=plan.padding,
+            )
+            output /= plan.scale
+
+        # channels x frames x bins to bins x frames x channels
+        return SpectrogramArray(output.T, stft_settings=settings)
+
+    def _transform(self, frames):
+        return self._compute(*self._schedule(frames))
+
+    def process(self, data):
+        """Consume a block of samples
+
+        Parameters
+        ----------
+        data : array_like
+            The block of samples. May be a 1D vector for single channel or
+            a 2D matrix of shape :code:`samples x channels` for multi channel
+            data.
+
+        Returns
+        -------
+        data : SpectrogramArray
+            All frames that were completed by this block, possibly none.
+
+        """
+        frames = self._frames(data)
+        self.length += len(data)
+        return self._transform(frames)
+
+    def _tail(self):
+        """Frames of the zero-padded end of the signal
+
+        """
+        if self.buffer is None:
+            raise ValueError("StreamingSTFT: no data has been processed")
+
+        plan = self.plan
+
+        # Total length of the padded signal in stft.spectrogram
+        length = (
+            (plan.frames(self.length) - 1) * plan.hopsize + plan.framelength
+        )
+
+        if self.stft_settings.outlength is None:
+            self.stft_settings = self.stft_settings.replace(
+                outlength=self.length
+            )
+
+        tail = numpy.zeros(
+            (max(
+                length - self.frames * plan.hopsize - len(self.buffer) +
+                self.skip, 0
+            ),) + self.buffer.shape[1:],
+            dtype=self.buffer.dtype
+        )
+        return self._frames(tail)
+
+    def flush(self):
+        """Zero-pad the end of the signal like :func:`stft.spectrogram` and
+        return all remaining frames.
+
+        Returns
+        -------
+        data : SpectrogramArray
+            The remaining frames
+
+        """
+        return self._transform(self._tail())
+
+
+class StreamingISTFT(object):
+    """Calculate the inverse spectrogram of a signal whose frames arrive in
+    blocks of arbitrary size.
+
+    The last :code:`framelength - hopsize` samples of the overlap-add are
+    kept between calls, so that samples are returned as soon as no further
+    frame contributes to them. The trailing padding of centered frames and,
+    if :code:`hopsize` exceeds :code:`framelength`, the gap after the last
+    frame are only returned by :meth:`flush`. Concatenating all outputs of
+    :meth:`process` and :meth:`flush` yields the same result as
+    :func:`stft.ispectrogram` of the entire spectrogram.
+
+    Parameters
+    ----------
+    framelength : int
+        The signal frame length. Defaults to :code:`1024`.
+    hopsize : int
+        The signal frame hopsize. Defaults to :code:`None`. Setting this
+        value will override :code:`overlap`.
+    overlap : int
+        The signal frame overlap coefficient. Value :code:`x` means
+        :code:`1/x` overlap. Defaults to :code:`2`.
+    centered : boolean
+        Remove the padding added by a centered forward transform. Defaults to
+        true.
+    window : callable, array_like
+        Window to be used for deringing. Defaults to
+        :func:`stft.stft.cosine`.
+    halved : boolean
+        Switch to reconstruct the other halve of the spectrum if the forward
+        transform has been truncated. Defaults to :code:`True`.
+    transform : callable, list of callables
+        The transform to be used. Defaults to the default backend, see
+        :mod:`stft.backends`.
+    padding : int
+        Zero-pad signal with x times the number of samples.
+    outlength : int
+        Crop output signal to length. Defaults to no cropping.
+    backend : str
+        Name of the FFT backend, see :func:`stft.ispectrogram`.
+
+    """
+    def __init__(
+        self,
+        framelength=1024,
+        hopsize=None,
+        overlap=None,
+        centered=True,
+        window=None,
+        halved=True,
+        transform=None,
+        padding=0,
+        outlength=None,
+        backend=None,
+    ):
+        self.plan = get_plan(
+            framelength=framelength,
+            hopsize=hopsize,
+            overlap=overlap,
+            centered=centered,
+            window=window,
+            halved=halved,
+            padding=padding,
+            itransform=transform,
+            backend=backend,
+        )
+        self.transforms = itertools.cycle(self.plan.itransform)
+        self.outlength = outlength
+
+        # Overlap-add samples not returned yet, channels x samples
+        self.buffer = None
+        # Index of the first sample of the buffer in the overlap-add
+        self.position = 0
+        # Number of frames consumed so far
+        self.frames = 0
+        # Number of leading samples still to be dropped
+        self.skip = (
+            self.plan.framelength // 2 if self.plan.centered else 0
+        )
+        # Number of output samples returned so far
+        self.length = 0
+
+    def _crop(self, data):
+        skip = min(self.skip, len(data))
+        data = data[skip:]
+        self.skip -= skip
+
+        if self.outlength is not None:
+            data = data[:max(self.outlength - self.length, 0)]
+
+        self.length += len(data)
+        return data
+
+    def process(self, data):
+        """Consume a block of frames
+
+        Parameters
+        ----------
+        data : array_like
+            The block of frames. May be a 2D matrix of shape :code:`bins x
+            frames` for single channel or a 3D tensor of shape :code:`bins x
+            frames x channels` for multi channel data.
+
+        Returns
+        -------
+        data : array_like
+            All samples that were completed by this block, possibly none.
+
+        """
+        data = numpy.asarray(data)
+
+        if data.ndim not in (2, 3):
+            raise ValueError("StreamingISTFT: Only 2D or 3D input data "
+                             "allowed")
+
+        if data.shape[1] == 0:
+            return self._crop(numpy.zeros((0,) + data.shape[2:]))
+
+        plan = self.plan
+
+        # bins x frames x channels to channels x frames x bins
+        frames = _iprocess_frames(
+            data.T,
+            # Keep precision of the spectrogram
+            window=plan._window(
+                data.dtype if numpy.iscomplexobj(data) else None
+            ),
+            halved=plan.halved,
+            transform=plan.itransform,
+            transforms=self.transforms,
+            padding=plan.padding,
+        )
+        output = utils.overlap_add(frames, plan.hopsize)
+
+        if self.buffer is not None:
+            # Frames further apart than their length leave gaps of zeros
+            # between the buffer and the output
+            offset = self.frames * plan.hopsize - self.position
+            length = max(self.buffer.shape[-1], offset + output.shape[-1])
+            if length > output.shape[-1]:
+                padded = numpy.zeros(
+                    output.shape[:-1] + (length,), dtype=output.dtype
+                )
+                padded[..., offset:] = output
+                output = padded
+            output[..., :self.buffer.shape[-1]] += self.buffer
+
+        self.frames += data.shape[1]
+
+        # No further frame contributes to the samples before the next frame.
+        # The gap after the last frame and the trailing padding of centered
+        # frames are kept for flush(), which may drop them.
+        end = (self.frames - 1) * plan.hopsize + plan.framelength
+        if plan.centered:
+            end -= (plan.framelength + 1) // 2
+        done = min(self.frames * plan.hopsize, end) - self.position
+
+        self.buffer = output[..., done:]
+        output = output[..., :done]
+        plan._normalize(output, start=self.position)
+        self.position += done
+
+        # channels x samples to samples x channels
+        return self._crop(output.T)
+
+    def flush(self):
+        """Return all remaining samples
+
+        Returns
+        -------
+        data : array_like
+            The remaining samples
+
+        """
+        if self.buffer is None:
+            raise ValueError("StreamingISTFT: no data has been processed")
+
+        plan = self.plan
+
+        output = self.buffer
+        plan._normalize(output, start=self.position, frames=self.frames)
+        output = output.T
+
+        # Samples up to the end of the last frame
+        end = (self.frames - 1) * plan.hopsize + plan.framelength
+        if plan.centered:
+            # Drop the trailing padding like utils.center_unpad
+            end -= (plan.framelength + 1) // 2
+        output = output[:max(end - self.position, 0)]
+
+        self.position += self.buffer.shape[-1]
+        self.buffer = self.buffer[..., :0]
+        return self._crop(output)
+
+
+class SlidingSpectrogram(object):
+    """Spectrogram of a sliding window over the most recent samples of a
+    signal, e.g. of a rolling buffer in a monitoring service.
+
+    Frames are kept in a ring buffer. When samples are appended, expired
+    frames are dropped and only new frames and frames touching the padding
+    at the edges of the window are calculated. The result is identical to
+    :func:`stft.spectrogram` of the current window. Appending a multiple of
+    :code:`hopsize` samples keeps the frame grid aligned, any other amount
+    requires recalculating all frames.
+
+    The window initially contains zeros.
+
+    Parameters
+    ----------
+    length : int
+        Length of the window in samples
+    channels : int
+        Number of channels. Defaults to a mono signal.
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, dtype, backend :
+        See :func:`stft.spectrogram`.
+
+    Attributes
+    ----------
+    plan : STFTPlan
+        The plan holding the resolved settings.
+    stft_settings : STFTSettings
+        The settings of the spectrogram of the window.
+
+    Examples
+    --------
+    >>> import numpy, stft
+    >>> s = stft.SlidingSpectrogram(8192, framelength=512)
+    >>> for block in numpy.split(numpy.random.random(20480), 10):
+    ...     x = s.update(block)
+    >>> numpy.allclose(x, stft.spectrogram(s.signal, framelength=512))
+    True
+
+    """
+    def __init__(
+        self,
+        length,
+        channels=None,
+        framelength=1024,
+        hopsize=None,
+        overlap=None,
+        centered=True,
+        window=None,
+        halved=True,
+        transform=None,
+        padding=0,
+        dtype=None,
+        backend=None,
+    ):
+        self.plan = plan = get_plan(
+            framelength=framelength,
+            hopsize=hopsize,
+            overlap=overlap,
+            centered=centered,
+            window=window,
+            halved=halved,
+            transform=transform,
+            padding=padding,
+            dtype=dtype,
+            backend=backend,
+        )
+        self.length = length
+        self.stft_settings = plan.stft_settings(length)
+
+        shape = () if channels is None else (channels,)
+        dtype = numpy.float64 if plan.dtype is None else plan.dtype
+        if not plan.halved:
+            dtype = numpy.result_type(dtype, numpy.complex64)
+
+        # Both rings hold every value twice, so that the current window is
+        # always a contiguous view starting at self._start or self._first
+        self._samples = numpy.zeros((2 * length,) + shape, dtype=dtype)
+        self._start = 0
+
+        self._nframes = plan.frames(length)
+        self._frames = numpy.zeros(
+            shape + (
+                2 * self._nframes,
+                plan.framelength * (plan.padding + 1) // 2 + 1
+                if plan.halved else
+                plan.framelength * (plan.padding + 1),
+            ),
+            dtype=numpy.result_type(dtype, numpy.complex64)
+        )
+        self._first = 0
+
+        # Frames that never touch the padding of the window, and can be
+        # reused once the window moved by a multiple of hopsize
+        offset = plan.framelength // 2 if plan.centered else 0
+        self._inner = (
+            -(-offset // plan.hopsize),
+            (length - plan.framelength + offset) // plan.hopsize,
+        )
+
+    @property
+    def signal(self):
+        """The current window of samples
+
+        """
+        return self._samples[self._start:self._start + self.length]
+
+    def _append(self, data):
+        length = self.length
+        if len(data) >= length:
+            self._samples[:length] = data[-length:]
+            self._samples[length:] = data[-length:]
+            self._start = 0
+        else:
+            # Overwrite the oldest samples
+            index = (self._start + numpy.arange(len(data))) % length
+            self._samples[index] = data
+            self._samples[index + length] = data
+            self._start = (self._start + len(data)) % length
+
+    def _transform(self, start, stop):
+        """Recalculate frames :code:`start` to :code:`stop` of the window
+
+        """
+        if stop <= start:
+            return
+
+        plan = self.plan
+        offset = plan.framelength // 2 if plan.centered else 0
+
+        data = utils.padded_slice(
+            self.signal,
+            start * plan.hopsize - offset,
+            (stop - 1) * plan.hopsize - offset + plan.framelength
+        )
+
+        output = _process_frames(
+            utils.frame(data, plan.framelength, plan.hopsize),
+            window=plan._window(plan.dtype),
+            halved=plan.halved,
+            transform=plan.transform,
+            # Keep the transform of each frame when cycling through several
+            transforms=itertools.islice(
+                itertools.cycle(plan.transform), start, None
+            ),
+            padding=plan.padding,
+        )
+        output /= plan.scale
+
+        index = (self._first + numpy.arange(start, stop)) % self._nframes
+        self._frames[..., index, :] = output
+        self._frames[..., index + self._nframes, :] = output
+
+    def update(self, data):
+        """Append samples and return the spectrogram of the window
+
+        Parameters
+        ----------
+        data : array_like
+            The samples. May be a 1D vector for single channel or a 2D matrix
+            of shape :code:`samples x channels` for multi channel data.
+
+        Returns
+        -------
+        data : SpectrogramArray
+            The spectrogram of the current window, identical to
+            :code:`stft.spectrogram(self.signal)`. This is a view of the ring
+            buffer, which is overwritten by the next update.
+
+        """
+        data = numpy.asarray(data)
+        plan = self.plan
+
+        if plan.halved and numpy.any(numpy.iscomplex(data)):
+            raise ValueError("You cannot treat a complex input signal as "
+                             "real valued. Please set keyword argument "
+                             "halved=False.")
+
+        if len(data) > 0:
+            self._append(data)
+
+            nframes = self._nframes
+            shift, rest = divmod(len(data), plan.hopsize)
+            inner, outer = self._inner
+
+            if (
+                rest or len(data) >= self.length or outer - shift < inner or
+                # Kept frames would be transformed by a different transform
+                shift % len(plan.transform)
+            ):
+                self._transform(0, nframes)
+            else:
+                with profiling.stage('reuse') as stage:
+                    self._first = (self._first + shift) % nframes
+                    stage.add(outer - shift - inner + 1)
+
+                self._transform(0, inner)
+                self._transform(max(inner, outer - shift + 1), nframes)
+
+        # channels x frames x bins to bins x frames x channels
+        return SpectrogramArray(
+            self._frames[..., self._first:self._first + self._nframes, :].T,
+            stft_settings=self.stft_settings
+        )
+
+
+def _open(data, dtype=None, channels=None):
+    """Open a signal lazily. Paths to :code:`.npy` files are memory-mapped,
+    any other path is memory-mapped as raw binary data of type :code:`dtype`
+    with :code:`channels` interleaved channels.
+
+    """
+    if not isinstance(data, str):
+        return data
+
+    if data.endswith('.npy'):
+        return numpy.load(data, mmap_mode='r')
+
+    if dtype is None:
+        raise ValueError("Reading raw binary data requires a dtype")
+
+    data = numpy.memmap(data, dtype=dtype, mode='r')
+    if channels is not None:
+        data = data.reshape(-1, channels)
+    return data
+
+
+def iter_spectrogram(
+    data,
+    blocksize=2 ** 20,
+    dtype=None,
+    channels=None,
+    **kwargs
+):
+    """Lazily calculate the spectrogram of a signal in blocks of bounded size
+
+    The signal is read in blocks of :code:`blocksize` samples and fed into a
+    :class:`StreamingSTFT`, so that peak memory is proportional to
+    :code:`blocksize` instead of the signal length.
+
+    Parameters
+    ----------
+    data : array_like, numpy.memmap, str
+        The signal to be transformed, in the shape of :code:`samples` or
+        :code:`samples x channels`. If a path is given, the file is
+        memory-mapped, see :code:`dtype` and :code:`channels`.
+    blocksize : int
+        Number of samples to read at once. Defaults to :code:`2 ** 20`.
+    dtype : numpy.dtype
+        Data type of raw binary files. Not needed for :code:`.npy` files.
+    channels : int
+        Number of interleaved channels of raw binary files. Defaults to a mono
+        signal.
+    kwargs :
+        Transform settings, see :func:`stft.spectrogram`.
+
+    Yields
+    ------
+    frame_index : int
+        Index of the first frame in this block
+    block : SpectrogramArray
+        Consecutive frames of the spectrogram, carrying the complete
+        :code:`stft_settings` for :func:`iter_ispectrogram`.
+
+    Examples
+    --------
+    Writing the spectrogram of a large file into a memory-mapped array
+
+    >>> import numpy, stft
+    >>> signal = numpy.random.random(10000)
+    >>> out = numpy.zeros((513, 21), dtype=complex)
+    >>> for i, block in stft.iter_spectrogram(signal, blocksize=4096):
+    ...     out[:, i:i + block.shape[1]] = block
+
+    """
+    data = _open(data, dtype=dtype, channels=channels)
+
+    s = StreamingSTFT(outlength=len(data), **kwargs)
+
+    index = 0
+    for start in range(0, len(data), blocksize):
+        block = s.process(numpy.asarray(data[start:start + blocksize]))
+        if block.shape[1] > 0:
+            yield index, block
+            index += block.shape[1]
+
+    yield index, s.flush()
+
+
+def iter_ispectrogram(
+    blocks,
+    **kwargs
+):
+    """Lazily calculate the inverse spectrogram of a signal in blocks
+
+    Parameters
+    ----------
+    blocks : iterable
+        Pairs of :code:`frame_index, block` as yielded by
+        :func:`iter_spectrogram`. The frames must be consecutive.
+    kwargs :
+        Transform settings, see :func:`stft.ispectrogram`. Defaults to infer
+        from the :code:`stft_settings` of the first block.
+
+    Yields
+    ------
+    sample_index : int
+        Index of the first sample in this block
+    samples : array_like
+        Consecutive samples of the signal
+
+    """
+    i = None
+    index = 0
+    for _, block in blocks:
+        if i is None:
+            settings = dict(getattr(block, 'stft_settings', None) or {})
+            # The stored transform is the forward transform
+            settings.pop('transform', None)
+            settings.pop('frame_offset', None)
+            if settings.pop('output', 'complex') != 'complex':
+                raise ValueError("Cannot invert a phase-less spectrogram")
+            settings.update(kwargs)
+            i = StreamingISTFT(**settings)
+
+        samples = i.process(block)
+        if len(samples) > 0:
+            yield index, samples
+            index += len(samples)
+
+    if i is not None:
+        yield index, i.flush()
@@ -1,11 +1,338 @@
 import numpy
 
 
+# Registered windows and transforms, by name
+_windows = {}
+_transforms = {}
+
+# Loaders registering transforms on first use, by name, see
+# stft.backends._register_lazy()
+_lazy_transforms = {}
+
+
+def register_window(name, window):
+    """Register a window function under a name, so that settings referencing
+    it can be serialized by name.
+
+    Parameters
+    ----------
+    name : str
+        The name
+    window : callable
+        The window function
+
+    """
+    _windows[name] = window
+
+
+def register_transform(name, transform):
+    """Register a transform under a name, so that settings referencing it can
+    be serialized by name.
+
+    Parameters
+    ----------
+    name : str
+        The name
+    transform : callable
+        The transform
+
+    """
+    _transforms[name] = transform
+
+
+def _name(registry, value):
+    for name, v in registry.items():
+        if v is value:
+            return name
+    return value
+
+
+def _lookup(registry, value):
+    if isinstance(value, str):
+        if registry is _transforms and value not in registry and (
+            value in _lazy_transforms
+        ):
+            _lazy_transforms[value]()
+        try:
+            return registry[value]
+        except KeyError:
+            raise ValueError("%s has not been registered" % value)
+    return value
+
+
+class STFTSettings(object):
+    """Immutable record of the settings of a spectrogram
+
+    Supports read-only mapping access, e.g. :code:`settings['framelength']`,
+    for compatibility with the dicts used in earlier versions. Windows and
+    transforms that have been registered using :func:`register_window` and
+    :func:`register_transform` are serialized by name, so that settings can
+    be pickled and exported compactly.
+
+    Parameters
+    ----------
+    framelength, hopsize, overlap, centered, window, halved, transform, \
+padding, outlength :
+        See :func:`stft.spectrogram`.
+    frame_offset : int
+        Index of the first frame in the spectrogram of the entire signal.
+        Defaults to :code:`0`.
+    output : str
+        The output mode, see :func:`stft.spectrogram`. Defaults to
+        :code:`'complex'`.
+
+    """
+    __slots__ = (
+        'framelength',
+        'hopsize',
+        'overlap',
+        'centered',
+        'window',
+        'halved',
+        'transform',
+        'padding',
+        'outlength',
+        'frame_offset',
+        'output',
+    )
+
+    def __init__(
+        self,
+        framelength,
+        hopsize,
+        overlap,
+        centered,
+        window,
+        halved,
+        transform,
+        padding,
+        outlength=None,
+        frame_offset=0,
+        output='complex',
+    ):
+        if isinstance(transform, list):
+            transform = tuple(transform)
+
+        values = locals()
+        for key in self.__slots__:
+            object.__setattr__(self, key, values[key])
+
+    def __setattr__(self, key, value):
+        raise AttributeError("STFTSettings are immutable, use replace()")
+
+    def __delattr__(self, key):
+        raise AttributeError("STFTSettings are immutable, use replace()")
+
+    def replace(self, **kwargs):
+        """Return a copy with some settings replaced
+
+        """
+        if 'transform' in kwargs or not _fields.issuperset(kwargs):
+            values = dict(self.items())
+            values.update(kwargs)
+            return STFTSettings(**values)
+
+        # Fast path, e.g. for the frame_offset of every slice of a
+        # SpectrogramArray: copy the slots without calling __init__
+        new = object.__new__(STFTSettings)
+        for key, get, set in _accessors:
+            set(new, kwargs[key] if key in kwargs else get(self))
+        return new
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def to_dict(self):
+        """Export settings with windows and transforms replaced by their
+        registered names and window arrays replaced by lists.
+
+        Returns
+        -------
+        settings : dict
+            The settings
+
+        """
+        values = dict(self.items())
+        values['window'] = _name(_windows, self.window)
+        if isinstance(values['window'], numpy.ndarray):
+            values['window'] = values['window'].tolist()
+        values['transform'] = [
+            _name(_transforms, t) for t in self.transform or ()
+        ]
+        return values
+
+    @classmethod
+    def from_dict(cls, values):
+        """Create settings from a dict as exported by :meth:`to_dict`
+
+        Parameters
+        ----------
+        values : dict
+            The settings
+
+        Returns
+        -------
+        settings : STFTSettings
+            The settings
+
+        """
+        values = dict(values)
+        values['window'] = _lookup(_windows, values['window'])
+        if isinstance(values['window'], list):
+            values['window'] = numpy.array(values['window'])
+        values['transform'] = [
+            _lookup(_transforms, t) for t in values['transform']
+        ]
+        return cls(**values)
+
+    def _key(self):
+        window = self.window
+        if isinstance(window, numpy.ndarray):
+            window = (window.dtype.str, window.shape, window.tobytes())
+        return tuple(
+            window if key == 'window' else getattr(self, key)
+            for key in self.__slots__
+        )
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __eq__(self, other):
+        if not isinstance(other, STFTSettings):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __reduce__(self):
+        values = dict(self.items())
+        values['window'] = _name(_windows, self.window)
+        values['transform'] = tuple(
+            _name(_transforms, t) for t in self.transform or ()
+        )
+        return (
+            _unpickle_settings,
+            (tuple(values[key] for key in self.__slots__),)
+        )
+
+    def __repr__(self):
+        return 'STFTSettings(%s)' % ', '.join(
+            '%s=%r' % item for item in self.items()
+        )
+
+
+# Names and slot descriptors of all settings, see STFTSettings.replace()
+_fields = frozenset(STFTSettings.__slots__)
+_accessors = [
+    (key, STFTSettings.__dict__[key].__get__,
+     STFTSettings.__dict__[key].__set__)
+    for key in STFTSettings.__slots__
+]
+
+
+def _unpickle_settings(values):
+    values = dict(zip(STFTSettings.__slots__, values))
+    values['window'] = _lookup(_windows, values['window'])
+    values['transform'] = [
+        _lookup(_transforms, t) for t in values['transform']
+    ]
+    return STFTSettings(**values)
+
+
+def _frames_key(key, ndim):
+    """The part of the tuple :code:`key` indexing the frames, i.e. the second
+    axis, :code:`slice(None)` if the frames are not indexed, or :code:`None`
+    if new axes are inserted before them
+
+    """
+    if key[0] is Ellipsis:
+        # The remaining indices apply to the last axes
+        rest = key[1:]
+        if None in rest or Ellipsis in rest:
+            return None
+        index = 1 - ndim + len(rest)
+        return rest[index] if index >= 0 else slice(None)
+
+    if key[0] is None or key[1] is None:
+        return None
+    if key[1] is Ellipsis:
+        return slice(None)
+    return key[1]
+
+
+def _frame_offset(index, nframes):
+    """Index of the first frame selected by :code:`index`, if it selects a
+    contiguous range of frames, or :code:`None`
+
+    """
+    if type(index) is slice:
+        start = index.start
+        if index.step in (None, 1):
+            if start is None:
+                return 0
+            if type(start) is int and 0 <= start <= nframes:
+                return start
+            return index.indices(nframes)[0]
+
+        start, stop, step = index.indices(nframes)
+        if len(range(start, stop, step)) <= 1:
+            return start
+        return None
+
+    index = numpy.asarray(index)
+    if index.ndim != 1:
+        # A single frame removes the axis of frames
+        return None
+    if index.dtype == bool:
+        index = numpy.flatnonzero(index)
+    if not len(index) or index.dtype.kind not in 'iu':
+        return None
+
+    index = index % nframes
+    if numpy.any(numpy.diff(index) != 1):
+        return None
+    return int(index[0])
+
+
 class SpectrogramArray(numpy.ndarray):
     """NumpyArray with additional :code:`stft_settings` attribute for saving
     stft-specific settings.
 
+    Slicing a contiguous range of frames updates
+    :code:`stft_settings.frame_offset`, so that :func:`stft.ispectrogram`
+    of the slice reconstructs the corresponding segment of the signal. A
+    slice only records the number of frames it is shifted by, its settings
+    are created when they are first accessed. Selecting single or
+    non-contiguous frames drops the settings.
+
     """
+    # Settings and frames they are yet to be shifted by
+    _settings = None
+    _offset = 0
+
     def __new__(cls, input_array, stft_settings=None):
         obj = numpy.asarray(input_array).view(cls)
         obj.stft_settings = stft_settings
@@ -14,4 +341,55 @@ class SpectrogramArray(numpy.ndarray):
     def __array_finalize__(self, obj):
         if obj is None:
             return
-        self.stft_settings = getattr(obj, 'stft_settings', None)
+        self._settings = getattr(obj, '_settings', None)
+        self._offset = getattr(obj, '_offset', 0)
+
+    @property
+    def stft_settings(self):
+        if self._offset:
+            self._settings = self._settings.replace(
+                frame_offset=self._settings.frame_offset + self._offset
+            )
+            self._offset = 0
+        return self._settings
+
+    @stft_settings.setter
+    def stft_settings(self, value):
+        self._settings = value
+        self._offset = 0
+
+    def __getitem__(self, key):
+        result = numpy.ndarray.__getitem__(self, key)
+
+        # Check the key first, most indexing does not select frames
+        if (
+            type(key) is not tuple or
+            len(key) < 2 or
+            self._settings is None or
+            not isinstance(result, SpectrogramArray)
+        ):
+            return result
+
+        if type(key[0]) is slice and type(key[1]) is slice:
+            index = key[1]
+        else:
+            index = _frames_key(key, self.ndim)
+
+        offset = None if index is None else _frame_offset(
+            index, self.shape[1]
+        )
+        if offset is None:
+            result._settings = None
+            result._offset = 0
+        elif offset and type(self._settings) is STFTSettings:
+            result._offset = self._offset + offset
+
+        return result
+
+    def __reduce__(self):
+        reconstruct, args, state = numpy.ndarray.__reduce__(self)
+        return reconstruct, args, (state, self.stft_settings)
+
+    def __setstate__(self, state):
+        state, self.stft_settings = state
+        numpy.ndarray.__setstate__(self, state)
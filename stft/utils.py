@@ -3,22 +3,48 @@ import numpy
 import math
 
 
-def pad(data, framelength):
+def padded_length(length, framelength, hopsize=None):
+    length = int(math.ceil(length / framelength) * framelength)
+
+    # Make sure the last frame is complete if hopsize does not divide
+    # framelength
+    if hopsize is not None:
+        length += -(length - framelength) % hopsize
+
+    return length
+
+
+def pad(data, framelength, hopsize=None):
+    length = padded_length(len(data), framelength, hopsize)
+
+    padtuple = [(0, 0)] * data.ndim
+    padtuple[0] = (0, length - len(data))
     return numpy.pad(
         data,
-        pad_width=(
-            0,
-            int(
-                math.ceil(
-                    len(data) / framelength
-                ) * framelength - len(data)
-            )
-        ),
+        pad_width=padtuple,
         mode='constant',
         constant_values=0
     )
 
 
+def frame(data, framelength, hopsize):
+    """Strided view of all frames of a signal of shape :code:`samples x ...`,
+    with shape :code:`... x frames x framelength`. No data is copied.
+
+    """
+    data = numpy.asarray(data)
+    frames = (len(data) - framelength) // hopsize + 1
+    return numpy.lib.stride_tricks.as_strided(
+        data,
+        shape=data.shape[1:][::-1] + (frames, framelength),
+        strides=(
+            data.strides[1:][::-1] +
+            (data.strides[0] * hopsize, data.strides[0])
+        ),
+        writeable=False,
+    )
+
+
 def unpad(data, outlength):
     slicetuple = [slice(None)] * data.ndim
     slicetuple[0] = slice(None, outlength)
@@ -40,3 +66,52 @@ def center_unpad(data, framelength):
     slicetuple = [slice(None)] * data.ndim
     slicetuple[0] = slice(framelength // 2, -framelength // 2)
     return data[tuple(slicetuple)]
+
+
+def overlap_add(frames, hopsize, out=None):
+    """Overlap-add a stack of frames of shape :code:`... x frames x
+    framelength` into a signal of shape :code:`... x samples`.
+
+    Instead of looping over frames, :code:`ceil(framelength / hopsize)`
+    slabs of :code:`hopsize` samples are added at once. The slabs are added
+    into :code:`out` of shape :code:`... x (frames + slabs) x hopsize`, if
+    given.
+
+    """
+    nframes, framelength = frames.shape[-2:]
+    slabs = int(math.ceil(framelength / hopsize))
+
+    if out is None:
+        output = numpy.zeros(
+            frames.shape[:-2] + (nframes + slabs, hopsize),
+            dtype=frames.dtype
+        )
+    else:
+        output = out
+        output[...] = 0
+
+    for k in range(slabs):
+        slab = frames[..., k * hopsize:(k + 1) * hopsize]
+        output[..., k:k + nframes, :slab.shape[-1]] += slab
+
+    output = output.reshape(frames.shape[:-2] + (-1,))
+    return output[..., :framelength + (nframes - 1) * hopsize]
+
+
+def padded_slice(data, start, stop, out=None):
+    """Copy of :code:`data[start:stop]` where samples outside of the signal
+    are zero. :code:`start` may be negative and :code:`stop` may exceed the
+    signal length. The copy is written into :code:`out`, if given.
+
+    """
+    if out is None:
+        output = numpy.zeros(
+            (stop - start,) + data.shape[1:], dtype=data.dtype
+        )
+    else:
+        output = out
+        output[...] = 0
+    a, b = max(start, 0), min(stop, len(data))
+    if b > a:
+        output[a - start:b - start] = data[a:b]
+    return output
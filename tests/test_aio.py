@@ -0,0 +1,154 @@
+from __future__ import division
+import asyncio
+import threading
+import concurrent.futures
+import numpy
+import pytest
+import stft
+
+
+async def source(signal, blocks):
+    for block in numpy.array_split(signal, blocks) if blocks else []:
+        await asyncio.sleep(0)
+        yield block
+
+
+def collect(signal, blocks, **kwargs):
+    async def main():
+        return [
+            (i, block) async for i, block in stft.aiter_spectrogram(
+                source(signal, blocks), **kwargs
+            )
+        ]
+    return asyncio.run(main())
+
+
+class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+    """
+    Records the largest number of simultaneously submitted transforms
+
+    """
+    def __init__(self, *args, **kwargs):
+        super(CountingExecutor, self).__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+
+    def submit(self, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        future = super(CountingExecutor, self).submit(*args, **kwargs)
+        future.add_done_callback(self.done)
+        return future
+
+    def done(self, future):
+        with self.lock:
+            self.active -= 1
+
+
+@pytest.mark.parametrize('blocks', [1, 3, 17])
+def test_aiter_spectrogram(signal, framelength, halved, blocks):
+    """
+    Test if the asynchronous frames equal the offline transform exactly
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength, halved=halved)
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        y = collect(
+            signal, blocks, executor=executor, framelength=framelength,
+            halved=halved, outlength=len(signal)
+        )
+
+    index = 0
+    for i, block in y:
+        assert i == index
+        assert block.stft_settings.frame_offset == i
+        index += block.shape[1]
+
+    z = numpy.concatenate([block for _, block in stft.iter_ispectrogram(y)])
+    assert numpy.allclose(z, signal)
+
+    y = numpy.concatenate([block for _, block in y], axis=1)
+    assert numpy.array_equal(x, y)
+
+
+def test_aiter_sparse_frames(signal):
+    """
+    Test if frames further apart than their length equal the offline
+    transform
+
+    """
+    x = stft.spectrogram(signal, framelength=256, hopsize=700)
+    y = collect(signal, 5, framelength=256, hopsize=700)
+
+    y = numpy.concatenate([block for _, block in y], axis=1)
+    assert numpy.array_equal(x, y)
+
+
+def test_aiter_transforms():
+    """
+    Test if lists of transforms are cycled through in frame order
+
+    """
+    signal = numpy.random.random(20000)
+    transform = [numpy.fft.fft, numpy.fft.fft, numpy.fft.fft]
+
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        y = collect(signal, 9, executor=executor, transform=transform)
+
+    assert numpy.array_equal(
+        numpy.concatenate([block for _, block in y], axis=1),
+        stft.spectrogram(signal, transform=transform)
+    )
+
+
+@pytest.mark.parametrize('max_pending', [1, 3])
+def test_backpressure(max_pending):
+    """
+    Test if no more than max_pending transforms are in flight
+
+    """
+    signal = numpy.random.random(100000)
+
+    with CountingExecutor(4) as executor:
+        y = collect(
+            signal, 50, executor=executor, max_pending=max_pending,
+            framelength=256
+        )
+
+    assert 0 < executor.peak <= max_pending
+    assert numpy.array_equal(
+        numpy.concatenate([block for _, block in y], axis=1),
+        stft.spectrogram(signal, framelength=256)
+    )
+
+
+def test_latency():
+    """
+    Test if finished transforms are yielded before max_pending blocks have
+    been read
+
+    """
+    read = []
+
+    async def slow(signal):
+        for block in numpy.array_split(signal, 8):
+            read.append(block)
+            yield block
+            await asyncio.sleep(0.05)
+
+    async def main():
+        async for i, block in stft.aiter_spectrogram(
+            slow(numpy.random.random(8192)), max_pending=4, framelength=256
+        ):
+            return len(read)
+
+    assert asyncio.run(main()) < 4
+
+
+def test_aiter_errors():
+    with pytest.raises(ValueError):
+        collect(numpy.ones(1000), 2, max_pending=0)
+
+    assert collect(numpy.ones(0), 0) == []
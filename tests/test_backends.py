@@ -0,0 +1,181 @@
+from __future__ import division
+import os
+import sys
+import subprocess
+import json
+import numpy
+import pytest
+import stft
+
+
+@pytest.fixture
+def cache(monkeypatch, tmpdir):
+    monkeypatch.setenv('STFT_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(stft.backends, '_tuned', None)
+    return str(tmpdir.join('backends.json'))
+
+
+@pytest.mark.parametrize('backend', stft.backends.backends())
+def test_backends(signal, framelength, halved, padding, backend):
+    """
+    Test if all backends equal the default transform
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=framelength, halved=halved, padding=padding,
+        backend=backend
+    )
+
+    assert numpy.allclose(
+        x,
+        stft.spectrogram(
+            signal, framelength=framelength, halved=halved, padding=padding
+        )
+    )
+    assert stft.stft.get_plan(
+        framelength=framelength, itransform=None, backend=backend
+    ).itransform == [stft.backends.get_backend(backend).ifft]
+    assert numpy.allclose(stft.ispectrogram(x), signal)
+
+
+def test_backend_inference():
+    """
+    Test if the inverse uses the backend of the forward transform
+
+    """
+    x = stft.spectrogram(numpy.random.random(10000), backend='numpy')
+
+    assert stft.backends._name(x.stft_settings.transform[0]) == 'numpy'
+    assert numpy.allclose(
+        stft.ispectrogram(x), stft.ispectrogram(x, backend='scipy')
+    )
+
+    plan = stft.stft.get_plan(framelength=1024, backend='numpy')
+    assert plan.transform == [numpy.fft.fft]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        stft.spectrogram(numpy.random.random(10000), backend='foo')
+
+
+def test_autotune(monkeypatch, cache):
+    """
+    Test if the fastest backend is cached in memory and on disk
+
+    """
+    name = stft.backends.autotune(512)
+    assert name in stft.backends.backends()
+
+    with open(cache) as f:
+        assert json.load(f) == {'512-0-True-float64': name}
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Backends timed twice")
+
+    monkeypatch.setattr(stft.backends, '_time', fail)
+    assert stft.backends.autotune(512) == name
+
+    # Reload from disk
+    monkeypatch.setattr(stft.backends, '_tuned', None)
+    assert stft.backends.autotune(512) == name
+
+    x = numpy.random.random(10000)
+    assert numpy.allclose(
+        stft.spectrogram(x, framelength=512, backend='auto'),
+        stft.spectrogram(x, framelength=512)
+    )
+
+
+def test_autotune_readonly(monkeypatch, cache):
+    """
+    Test if an unwritable cache directory is ignored
+
+    """
+    open(cache, 'w').close()
+    monkeypatch.setenv('STFT_CACHE_DIR', os.path.join(cache, 'foo'))
+    assert stft.backends.autotune(256) in stft.backends.backends()
+
+
+def test_autotune_random_state(cache):
+    """
+    Test if timing the backends leaves the global random stream untouched
+
+    """
+    numpy.random.seed(0)
+    expected = numpy.random.random()
+
+    numpy.random.seed(0)
+    stft.backends.autotune(128)
+    assert numpy.random.random() == expected
+
+
+def run_python(code):
+    """
+    Run code in a fresh interpreter, so that no modules are imported yet
+
+    """
+    env = dict(
+        os.environ,
+        PYTHONPATH=os.path.dirname(os.path.dirname(stft.__file__))
+    )
+    return subprocess.check_output(
+        [sys.executable, '-c', code], env=env
+    ).decode().split()
+
+
+def test_lazy_import():
+    """
+    Test if SciPy is only imported once a transform needs it
+
+    """
+    assert run_python(
+        "import sys, numpy, stft\n"
+        "print('scipy' in sys.modules)\n"
+        "stft.spectrogram(numpy.ones(10000), backend='numpy')\n"
+        "print('scipy' in sys.modules)\n"
+        "x = stft.spectrogram(numpy.ones(10000))\n"
+        "print('scipy' in sys.modules)\n"
+        "print(x.stft_settings.to_dict()['transform'][0])\n"
+    ) == ['False', 'False', 'True', 'scipy.fft.fft']
+
+
+def test_lazy_lookup():
+    """
+    Test if transforms of backends that have not been used yet are
+    recognized
+
+    """
+    import scipy.fft
+
+    settings = stft.types.STFTSettings.from_dict(
+        stft.spectrogram(numpy.ones(10000)).stft_settings.to_dict()
+    )
+    assert settings.transform == (scipy.fft.fft,)
+
+    assert run_python(
+        "import sys, stft\n"
+        "s = stft.types.STFTSettings.from_dict(dict(\n"
+        "    framelength=1024, hopsize=512, overlap=2, centered=True,\n"
+        "    window='cosine', halved=True, transform=['scipy.fft.fft'],\n"
+        "    padding=0))\n"
+        "print(s.transform[0] is sys.modules['scipy.fft'].fft)\n"
+        "import scipy.fft\n"
+        "plan = stft.STFTPlan(transform=scipy.fft.fft)\n"
+        "print(stft.backends._name(plan.transform[0]))\n"
+    ) == ['True', 'scipy']
+
+
+def test_numpy_fallback():
+    """
+    Test if the numpy backend is used if SciPy is not installed
+
+    """
+    assert run_python(
+        "import sys, numpy\n"
+        "sys.modules['scipy'] = None\n"
+        "import stft\n"
+        "x = numpy.random.random(10000)\n"
+        "print(stft.backends.default(), stft.backends.backends())\n"
+        "print(numpy.allclose(stft.ispectrogram(stft.spectrogram(x)), x))\n"
+    ) == ['numpy', "['numpy']", 'True']
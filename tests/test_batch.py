@@ -0,0 +1,67 @@
+from __future__ import division
+import numpy
+import pytest
+import stft
+
+
+@pytest.fixture
+def signals(channels):
+    return [
+        numpy.squeeze(numpy.random.random((length, channels)))
+        for length in [1000, 2048, 1500, 2048, 5000, 10]
+    ]
+
+
+def test_batch(signals, framelength, halved, padding):
+    """
+    Test if batch transforms equal single transforms
+
+    """
+    x = stft.spectrogram_batch(
+        signals, framelength=framelength, halved=halved, padding=padding
+    )
+    y = stft.ispectrogram_batch(x)
+
+    for signal, x_i, y_i in zip(signals, x, y):
+        assert numpy.allclose(
+            x_i,
+            stft.spectrogram(
+                signal, framelength=framelength, halved=halved,
+                padding=padding
+            )
+        )
+        assert x_i.stft_settings['outlength'] == len(signal)
+        assert numpy.allclose(y_i, signal)
+
+
+def test_batch_padded(signals, framelength):
+    """
+    Test if padded batch transforms equal single transforms
+
+    """
+    x, lengths = stft.spectrogram_batch(
+        signals, framelength=framelength, padded=True
+    )
+    y = stft.ispectrogram_batch(x, lengths)
+
+    assert x.shape[0] == len(signals)
+    assert y.shape[:2] == (len(signals), max(lengths))
+
+    for signal, x_i, y_i in zip(signals, x, y):
+        s = stft.spectrogram(signal, framelength=framelength)
+        assert numpy.allclose(x_i[:, :s.shape[1]], s)
+        assert numpy.allclose(x_i[:, s.shape[1]:], 0)
+        assert numpy.allclose(y_i[:len(signal)], signal)
+
+
+def test_batch_errors():
+    with pytest.raises(ValueError):
+        stft.spectrogram_batch(
+            [numpy.zeros(100), numpy.zeros((100, 2))], padded=True
+        )
+
+    with pytest.raises(ValueError):
+        stft.spectrogram_batch([numpy.zeros((100, 2, 2))])
+
+    with pytest.raises(ValueError):
+        stft.spectrogram_batch([numpy.ones(100) * 1j])
@@ -0,0 +1,97 @@
+from __future__ import division
+import os
+import numpy
+import pytest
+import stft
+
+
+@pytest.fixture
+def files(tmpdir):
+    paths = []
+    for i, name in enumerate(['a.npy', 'b.npy', os.path.join('sub', 'a.npy')]):
+        path = str(tmpdir.join('in', name))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        numpy.save(path, numpy.random.random((10000 + 1000 * i, 2)))
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_process_files(tmpdir, files, processes):
+    """
+    Test if all files are transformed, keeping subdirectories
+
+    """
+    outdir = str(tmpdir.join('out'))
+    calls = []
+
+    outputs = stft.process_files(
+        files, outdir, processes=processes, framelength=512,
+        progress=lambda *args: calls.append(args)
+    )
+
+    assert outputs == [
+        os.path.join(outdir, 'a.stft'),
+        os.path.join(outdir, 'b.stft'),
+        os.path.join(outdir, 'sub', 'a.stft'),
+    ]
+    for path, output in zip(files, outputs):
+        x = stft.load(output)
+        assert numpy.allclose(
+            x, stft.spectrogram(numpy.load(path), framelength=512)
+        )
+        assert x.stft_settings.framelength == 512
+
+    assert [c[:2] for c in calls] == [(1, 3), (2, 3), (3, 3)]
+    assert sorted(c[2] for c in calls) == sorted(files)
+    assert not [f for f in os.listdir(outdir) if f.endswith('.tmp')]
+
+
+def test_resume(tmpdir, files):
+    """
+    Test if existing spectrograms are skipped unless overwritten
+
+    """
+    outdir = str(tmpdir.join('out'))
+    outputs = stft.process_files(files[:2], outdir, processes=1)
+    mtime = os.path.getmtime(outputs[0])
+    os.utime(outputs[0], (0, 0))
+
+    calls = []
+    stft.process_files(
+        files, outdir, processes=1, progress=lambda *args: calls.append(args)
+    )
+    assert os.path.getmtime(outputs[0]) == 0
+    assert [c[2] for c in calls] == files
+    assert os.path.exists(os.path.join(outdir, 'sub', 'a.stft'))
+
+    stft.process_files(files, outdir, processes=1, overwrite=True)
+    assert os.path.getmtime(outputs[0]) >= mtime
+
+
+def test_process_files_errors(tmpdir, files):
+    """
+    Test if a failing file leaves no partial output behind
+
+    """
+    outdir = str(tmpdir.join('out'))
+    with pytest.raises(ValueError):
+        stft.process_files(files, outdir, processes=1, layout='foo')
+
+    assert not os.listdir(outdir)
+    assert stft.process_files([], outdir) == []
+
+
+def test_process_files_collision(tmpdir, files):
+    """
+    Test if signals sharing an output name are rejected before any work
+
+    """
+    path = os.path.splitext(files[0])[0] + '.wav'
+    outdir = str(tmpdir.join('out'))
+
+    with pytest.raises(ValueError):
+        stft.process_files(files + [path], outdir, processes=1)
+
+    assert not os.path.exists(outdir)
@@ -0,0 +1,98 @@
+from __future__ import division
+import numpy
+import pytest
+import stft
+
+
+@pytest.mark.parametrize('filterbank', ['mel', 'constant_q'])
+@pytest.mark.parametrize('output', ['magnitude', 'power', 'db'])
+def test_features(channels, filterbank, output):
+    """
+    Test if the features equal projecting the entire spectrogram
+
+    """
+    signal = numpy.squeeze(numpy.random.random((20000, channels)))
+    matrix = getattr(stft.filterbank, filterbank)(2048, 16000, n_bands=40)
+
+    x = stft.features(
+        signal, 16000, filterbank=filterbank, n_bands=40, output=output,
+        framelength=2048
+    )
+    spectrum = numpy.abs(stft.spectrogram(
+        signal, framelength=2048, dtype=numpy.float32
+    ))
+    if output != 'magnitude':
+        spectrum **= 2
+    y = numpy.tensordot(matrix.toarray(), spectrum, axes=1)
+    if output == 'db':
+        y = 10 * numpy.log10(numpy.maximum(y, 1e-10))
+
+    assert x.dtype == numpy.float32
+    assert x.shape == (40,) + spectrum.shape[1:]
+    assert numpy.allclose(x, y, rtol=1e-4, atol=1e-4)
+    assert x.stft_settings.output == output
+
+    assert numpy.allclose(
+        x[:, 3:5],
+        stft.features(
+            signal, 16000, filterbank=filterbank, n_bands=40, output=output,
+            framelength=2048, start=3, stop=5
+        )
+    )
+
+
+def test_filterbanks():
+    """
+    Test if the filterbanks are cached and every band covers a bin
+
+    """
+    assert stft.filterbank.mel(1024, 16000) is stft.filterbank.mel(
+        1024, 16000
+    )
+
+    for matrix in [
+        stft.filterbank.mel(1024, 16000, n_bands=128),
+        stft.filterbank.constant_q(1024, 16000),
+        stft.filterbank.constant_q(1024, 16000, padding=1),
+    ]:
+        matrix = matrix.toarray()
+        assert matrix.dtype == numpy.float32
+        assert numpy.all(matrix.max(axis=1) > 0)
+        assert numpy.all(matrix <= 1)
+
+
+def test_custom_filterbank(signal):
+    """
+    Test if any matrix can be used as a filterbank
+
+    """
+    matrix = numpy.random.random((10, 513))
+
+    x = stft.features(signal, 16000, filterbank=matrix, output='magnitude')
+    y = numpy.tensordot(
+        matrix, stft.spectrogram(signal, output='magnitude'), axes=1
+    )
+    assert x.dtype == numpy.float32
+    assert numpy.allclose(x, y, rtol=1e-4)
+
+    z = stft.features(
+        signal, 16000, filterbank=matrix.tolist(), output='magnitude'
+    )
+    assert numpy.array_equal(x, z)
+
+
+def test_filterbank_errors(signal):
+    with pytest.raises(ValueError):
+        stft.features(signal, 16000, filterbank='foo')
+
+    with pytest.raises(ValueError):
+        stft.features(signal, 16000, output='complex')
+
+    with pytest.raises(ValueError):
+        stft.features(signal, 16000, filterbank=numpy.ones((10, 20)))
+
+    with pytest.raises(ValueError):
+        stft.filterbank.mel(1024, 16000, fmax=10000)
+
+    with pytest.raises(ValueError):
+        stft.filterbank.constant_q(1024, 16000, n_bands=200)
@@ -0,0 +1,129 @@
+from __future__ import division
+import numpy
+import pytest
+import stft
+
+
+def convergence(magnitude, signal):
+    return numpy.linalg.norm(
+        magnitude - numpy.abs(stft.spectrogram(signal))
+    ) / numpy.linalg.norm(magnitude)
+
+
+@pytest.mark.parametrize('momentum', [0, 0.99])
+def test_griffin_lim(channels, momentum):
+    """
+    Test if Griffin-Lim reconstructs the magnitude of a signal
+
+    """
+    signal = numpy.squeeze(
+        numpy.random.RandomState(0).random_sample((10000, channels))
+    )
+    magnitude = stft.spectrogram(signal, output='magnitude')
+
+    y = stft.griffin_lim(magnitude, n_iter=0, momentum=momentum, seed=0)
+    z = stft.griffin_lim(magnitude, n_iter=50, momentum=momentum, seed=0)
+
+    assert z.shape == signal.shape
+    assert convergence(magnitude, z) < convergence(magnitude, y) / 2
+
+    phase = numpy.random.RandomState(0).uniform(
+        -numpy.pi, numpy.pi, magnitude.shape
+    )
+    for c in range(channels if signal.ndim > 1 else 0):
+        # Each channel equals reconstructing it on its own
+        assert numpy.allclose(
+            z[:, c],
+            stft.griffin_lim(
+                magnitude[:, :, c], n_iter=50, momentum=momentum,
+                phase=phase[:, :, c]
+            )
+        )
+
+
+@pytest.mark.parametrize('frames', [1, 7, 20])
+def test_frames(frames):
+    """
+    Test if a plain array with any number of frames is reconstructed
+
+    """
+    signal = numpy.random.RandomState(0).random_sample(10000)
+    magnitude = numpy.asarray(
+        stft.spectrogram(signal, output='magnitude')
+    )[:, :frames]
+
+    y = stft.griffin_lim(magnitude, n_iter=20, seed=0)
+    assert y.shape == stft.ispectrogram(magnitude).shape
+
+
+def test_slice():
+    """
+    Test if a slice of frames is reconstructed in its place in the signal,
+    like ispectrogram does
+
+    """
+    signal = numpy.random.RandomState(0).random_sample(10000)
+    x = stft.spectrogram(signal, output='magnitude')[:, 5:15]
+
+    def error(y):
+        # The frames cover the samples from the center of frame 4 on
+        full = numpy.zeros_like(signal)
+        full[4 * 512:4 * 512 + len(y)] = y
+        return numpy.linalg.norm(
+            x - numpy.abs(stft.spectrogram(full)[:, 5:15])
+        )
+
+    y = stft.griffin_lim(x, n_iter=0, seed=0)
+    z = stft.griffin_lim(x, n_iter=50, seed=0)
+
+    assert z.shape == stft.ispectrogram(
+        stft.spectrogram(signal)[:, 5:15]
+    ).shape
+    assert error(z) < error(y) / 2
+
+
+def test_momentum():
+    """
+    Test if the fast algorithm converges faster
+
+    """
+    signal = numpy.random.random(10000)
+    magnitude = stft.spectrogram(signal, output='magnitude')
+
+    assert convergence(
+        magnitude, stft.griffin_lim(magnitude, n_iter=30, seed=0)
+    ) < convergence(
+        magnitude, stft.griffin_lim(magnitude, n_iter=30, momentum=0, seed=0)
+    )
+
+
+def test_tol():
+    """
+    Test early stopping
+
+    """
+    signal = numpy.random.random(10000)
+    magnitude = stft.spectrogram(signal, output='magnitude')
+
+    with stft.profile() as p:
+        stft.griffin_lim(magnitude, n_iter=1000, tol=1e-2, seed=0)
+
+    calls = [c for c in p.as_dict()['calls'] if c['name'] == 'spectrogram']
+    assert 1 < len(calls) < 1000
+
+
+@pytest.mark.parametrize('momentum', [0, 0.99])
+def test_buffers(momentum):
+    """
+    Test if iterations write into the spectrograms of previous iterations
+
+    """
+    signal = numpy.random.random(10000)
+    magnitude = stft.spectrogram(signal, output='magnitude')
+
+    with stft.profile() as p:
+        stft.griffin_lim(magnitude, n_iter=10, momentum=momentum, seed=0)
+
+    calls = [c for c in p.as_dict()['calls'] if c['name'] == 'spectrogram']
+    assert len(calls) == 10
+    assert sum(c['stages']['store']['bytes'] > 0 for c in calls) <= 2
@@ -0,0 +1,87 @@
+from __future__ import division
+import json
+import threading
+import numpy
+import stft
+
+
+def test_profile(signal, framelength):
+    """
+    Test if stages of all calls are recorded and exportable
+
+    """
+    calls = []
+
+    with stft.profile(callback=calls.append) as p:
+        x = stft.spectrogram(signal, framelength=framelength, workers=2)
+        stft.ispectrogram(x)
+
+    stats = p.as_dict()
+    json.dumps(stats)
+
+    assert [c['name'] for c in stats['calls']] == [
+        'spectrogram', 'ispectrogram'
+    ]
+    assert calls == stats['calls']
+    assert stats['calls'][0]['frames'] == x.shape[1]
+    assert stats['calls'][0]['stages']['fft']['frames'] == x.shape[1]
+    assert stats['calls'][1]['stages']['overlap_add']['frames'] == x.shape[1]
+    assert stats['stages']['fft']['count'] >= 2
+
+
+def test_profile_disabled():
+    """
+    Test if nothing is recorded outside of the profile
+
+    """
+    with stft.profile() as p:
+        pass
+
+    stft.spectrogram(numpy.random.random(10000))
+
+    assert p.as_dict() == {'calls': [], 'stages': {}}
+    assert not stft.profiling._active.get()
+
+
+def test_profile_streaming():
+    """
+    Test if stages run outside of calls are recorded
+
+    """
+    with stft.profile() as p:
+        s = stft.StreamingSTFT()
+        s.process(numpy.random.random(10000))
+
+    stats = p.as_dict()
+    assert stats['calls'] == []
+    assert 'fft' in stats['stages']
+
+
+def test_profile_threads():
+    """
+    Test if concurrent profiles only record the calls of their own thread,
+    including those of the workers it starts
+
+    """
+    barrier = threading.Barrier(2)
+    stats = {}
+
+    def run(calls):
+        x = numpy.random.random(10000)
+        with stft.profile() as p:
+            barrier.wait()
+            for i in range(calls):
+                stft.spectrogram(x, workers=2)
+            barrier.wait()
+        stats[calls] = p.as_dict()
+
+    threads = [threading.Thread(target=run, args=(n,)) for n in (5, 20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for calls in (5, 20):
+        assert len(stats[calls]['calls']) == calls
+        assert stats[calls]['stages']['fft']['count'] >= calls
+        assert stats[calls]['stages']['frame']['count'] == calls
@@ -0,0 +1,103 @@
+from __future__ import division
+import numpy
+import pytest
+import stft
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('x.stft'))
+
+
+def test_roundtrip(path, signal, framelength, halved):
+    """
+    Test if saved spectrograms load unchanged, including their settings
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength, halved=halved)
+    stft.save(path, x, chunksize=3)
+    y = stft.load(path)
+
+    assert numpy.array_equal(x, y)
+    assert y.dtype == x.dtype
+    assert y.stft_settings == x.stft_settings
+    assert numpy.allclose(stft.ispectrogram(y), signal)
+
+
+@pytest.mark.parametrize('dtype, rtol', [
+    (numpy.float32, 1e-6),
+    (numpy.float16, 1e-3),
+])
+def test_precision(path, signal, dtype, rtol):
+    """
+    Test reduced precision
+
+    """
+    x = stft.spectrogram(signal)
+    stft.save(path, x, dtype=dtype)
+    y = stft.load(path)
+
+    assert numpy.allclose(x, y, rtol=rtol, atol=rtol)
+    assert numpy.allclose(stft.ispectrogram(y), signal, atol=rtol * 10)
+
+
+@pytest.mark.parametrize('phase_bits', [8, 16])
+def test_polar(path, signal, phase_bits):
+    """
+    Test polar layout with quantized phase
+
+    """
+    x = stft.spectrogram(signal)
+    stft.save(path, x, layout='polar', phase_bits=phase_bits)
+    y = stft.load(path)
+
+    assert numpy.allclose(numpy.abs(x), numpy.abs(y))
+    # Error of the phase is at most half a quantization step
+    assert numpy.all(
+        numpy.abs(x - y) <= numpy.abs(x) * numpy.pi / 2 ** phase_bits + 1e-9
+    )
+
+
+def test_magnitude(path, signal):
+    """
+    Test magnitude only layout
+
+    """
+    x = stft.spectrogram(signal)
+    stft.save(path, x, layout='magnitude', dtype=numpy.float32)
+    y = stft.load(path)
+
+    assert not numpy.iscomplexobj(y)
+    assert numpy.allclose(numpy.abs(x), y, atol=1e-5)
+
+
+def test_frame_range(path, signal):
+    """
+    Test reading ranges of frames
+
+    """
+    x = stft.spectrogram(signal)
+    stft.save(path, x)
+    f = stft.storage.SpectrogramFile(path)
+
+    assert f.shape == x.shape
+    assert numpy.array_equal(f[:, 3:7], x[:, 3:7])
+    assert numpy.array_equal(stft.load(path, 5), x[:, 5:])
+    assert f[:, 3:7].stft_settings == x[:, 3:7].stft_settings
+    assert f[:, 7:3].shape[1] == 0
+
+    with pytest.raises(IndexError):
+        f[0]
+
+
+def test_errors(path, signal):
+    x = stft.spectrogram(signal)
+
+    with pytest.raises(ValueError):
+        stft.save(path, x, layout='foo')
+
+    with pytest.raises(ValueError):
+        stft.save(path, x, layout='polar', phase_bits=4)
+
+    with pytest.raises(ValueError):
+        stft.save(path, stft.spectrogram(signal, transform=lambda x: x))
@@ -0,0 +1,267 @@
+from __future__ import division
+import numpy
+import pytest
+import stft
+
+
+@pytest.fixture(params=[1, 3, 7])
+def blocks(request):
+    return request.param
+
+
+def test_streaming(signal, framelength, padding, halved, blocks):
+    """
+    Test if concatenated streaming output equals the batch output
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, halved=halved
+    )
+
+    s = stft.StreamingSTFT(
+        framelength=framelength, padding=padding, halved=halved
+    )
+    y = [s.process(b) for b in numpy.array_split(signal, blocks)]
+    y = numpy.concatenate(y + [s.flush()], axis=1)
+
+    assert y.shape == x.shape
+    assert numpy.allclose(x, y)
+
+    i = stft.StreamingISTFT(
+        framelength=framelength, padding=padding, halved=halved,
+        outlength=len(signal)
+    )
+    z = [i.process(b) for b in numpy.array_split(y, blocks, axis=1)]
+    z = numpy.concatenate(z + [i.flush()])
+
+    assert numpy.allclose(z, stft.ispectrogram(x))
+    assert numpy.allclose(z, signal)
+
+
+def test_streaming_uncentered(signal, framelength):
+    """
+    Test if uncentered streaming without known output length equals the batch
+    output
+
+    """
+    x = numpy.array(
+        stft.spectrogram(signal, framelength=framelength, centered=False)
+    )
+
+    i = stft.StreamingISTFT(framelength=framelength, centered=False)
+    z = [i.process(b) for b in numpy.array_split(x, 3, axis=1)]
+    z = numpy.concatenate(z + [i.flush()])
+
+    y = stft.ispectrogram(x, framelength=framelength, centered=False)
+    assert numpy.allclose(z, y)
+
+
+def test_streaming_short():
+    """
+    Test if blocks shorter than a frame work
+
+    """
+    a = numpy.random.random(1000)
+    s = stft.StreamingSTFT(framelength=1024)
+
+    assert s.process(a[:10]).shape[1] == 0
+    y = numpy.concatenate([s.process(a[10:]), s.flush()], axis=1)
+
+    assert numpy.allclose(y, stft.spectrogram(a, framelength=1024))
+
+
+def test_streaming_flush_errors():
+    with pytest.raises(ValueError):
+        stft.StreamingSTFT().flush()
+
+    with pytest.raises(ValueError):
+        stft.StreamingISTFT().flush()
+
+
+def test_iter_memmap(tmpdir, signal, framelength):
+    """
+    Test if lazily transforming memory-mapped files equals the batch output
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength)
+
+    raw = str(tmpdir.join('signal.raw'))
+    signal.astype('float32').tofile(raw)
+    npy = str(tmpdir.join('signal.npy'))
+    numpy.save(npy, signal.astype('float32'))
+
+    channels = signal.shape[1] if signal.ndim == 2 else None
+
+    for y in [
+        stft.iter_spectrogram(
+            raw, dtype='float32', channels=channels, blocksize=1000,
+            framelength=framelength
+        ),
+        stft.iter_spectrogram(npy, blocksize=1000, framelength=framelength),
+    ]:
+        out = numpy.lib.format.open_memmap(
+            str(tmpdir.join('out.npy')), mode='w+', dtype=x.dtype,
+            shape=x.shape
+        )
+        blocks = []
+        for i, block in y:
+            out[:, i:i + block.shape[1]] = block
+            blocks.append((i, block))
+
+        assert numpy.allclose(out, x, atol=1e-6)
+
+        z = numpy.zeros_like(signal)
+        for i, samples in stft.iter_ispectrogram(blocks):
+            z[i:i + len(samples)] = samples
+
+        assert numpy.allclose(z, signal, atol=1e-6)
+
+
+def test_iter_raw_errors(tmpdir):
+    raw = str(tmpdir.join('signal.raw'))
+    numpy.zeros(10).tofile(raw)
+
+    with pytest.raises(ValueError):
+        next(stft.iter_spectrogram(raw))
+
+
+@pytest.mark.parametrize('hopsize', [100, 300, 700])
+@pytest.mark.parametrize('centered', [True, False])
+def test_streaming_hopsize(signal, hopsize, centered, blocks):
+    """
+    Test if streaming with any hopsize equals the batch output
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=1024, hopsize=hopsize, centered=centered
+    )
+
+    i = stft.StreamingISTFT(
+        framelength=1024, hopsize=hopsize, centered=centered,
+        outlength=len(signal)
+    )
+    z = [i.process(b) for b in numpy.array_split(x, blocks, axis=1)]
+    z = numpy.concatenate(z + [i.flush()])
+
+    assert numpy.allclose(z, signal)
+
+
+@pytest.mark.parametrize('sizes', [
+    [512] * 20,
+    [1024, 2048, 512, 8192, 512],
+    [100, 7, 512, 20000, 1000],
+])
+@pytest.mark.parametrize('centered', [True, False])
+def test_sliding(channels, framelength, halved, sizes, centered):
+    """
+    Test if sliding window updates equal transforming the entire window
+
+    """
+    s = stft.SlidingSpectrogram(
+        10000, channels=channels if channels > 1 else None,
+        framelength=framelength, halved=halved, centered=centered
+    )
+    signal = numpy.squeeze(numpy.random.random((sum(sizes), channels)))
+
+    start = 0
+    for size in sizes:
+        x = s.update(signal[start:start + size])
+        start += size
+
+        window = signal[max(start - 10000, 0):start]
+        window = numpy.concatenate(
+            (numpy.zeros((10000 - len(window),) + window.shape[1:]), window)
+        )
+        assert numpy.array_equal(s.signal, window)
+
+        y = stft.spectrogram(
+            window, framelength=framelength, halved=halved, centered=centered
+        )
+        assert x.shape == y.shape
+        assert numpy.allclose(x, y)
+
+
+def test_sliding_reuse():
+    """
+    Test if aligned updates only calculate new and edge frames
+
+    """
+    s = stft.SlidingSpectrogram(2 ** 16, framelength=1024)
+    x = s.update(numpy.random.random(2 ** 16))
+
+    with stft.profile() as p:
+        y = s.update(numpy.random.random(2048))
+
+    stages = p.as_dict()['stages']
+    assert stages['reuse']['frames'] == x.shape[1] - 6
+    assert stages['fft']['frames'] == 6
+    assert numpy.shares_memory(x, y)
+
+
+def doubled(data, *args, **kwargs):
+    return 2 * numpy.fft.fft(data, *args, **kwargs)
+
+
+@pytest.mark.parametrize('size', [256, 512, 768])
+def test_sliding_transforms(size):
+    """
+    Test if lists of transforms stay aligned with the frames of the window
+
+    """
+    transform = [numpy.fft.fft, doubled]
+    s = stft.SlidingSpectrogram(4096, framelength=512, transform=transform)
+
+    for block in numpy.split(numpy.random.random(20 * size), 20):
+        x = s.update(block)
+        assert numpy.allclose(
+            x, stft.spectrogram(
+                s.signal, framelength=512, transform=transform
+            )
+        )
+
+
+@pytest.mark.parametrize('hopsize', [300, 700])
+@pytest.mark.parametrize('centered', [True, False])
+def test_streaming_sparse_frames(signal, hopsize, centered, blocks):
+    """
+    Test if frames further apart than their length equal the batch output
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=256, hopsize=hopsize, centered=centered
+    )
+
+    s = stft.StreamingSTFT(
+        framelength=256, hopsize=hopsize, centered=centered
+    )
+    y = [s.process(b) for b in numpy.array_split(signal, blocks)]
+    y = numpy.concatenate(y + [s.flush()], axis=1)
+
+    assert numpy.allclose(x, y)
+
+
+@pytest.mark.parametrize('hopsize', [300, 700])
+@pytest.mark.parametrize('centered', [True, False])
+@pytest.mark.parametrize('outlength', [True, False])
+def test_streaming_inverse_sparse_frames(signal, hopsize, centered,
+                                         outlength, blocks):
+    """
+    Test if inverting frames further apart than their length equals the
+    batch output
+
+    """
+    x = numpy.asarray(stft.spectrogram(
+        signal, framelength=256, hopsize=hopsize, centered=centered
+    ))
+    settings = dict(framelength=256, hopsize=hopsize, centered=centered)
+    if outlength:
+        settings['outlength'] = len(signal)
+
+    y = stft.ispectrogram(x, **settings)
+
+    i = stft.StreamingISTFT(**settings)
+    z = [i.process(b) for b in numpy.array_split(x, blocks, axis=1)]
+    z = numpy.concatenate(z + [i.flush()])
+
+    assert z.shape == y.shape
+    assert numpy.allclose(z, y)
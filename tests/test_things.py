@@ -3,6 +3,8 @@ import stft
 import scipy
 import numpy
 import pytest
+import tracemalloc
+import concurrent.futures
 
 
 def test_shape(length, framelength):
@@ -140,19 +142,398 @@ def test_issue_autoinverse_defaults(signal):
     y = stft.ispectrogram(x)
 
 
-def raiser(*args):
-    raise AttributeError
+def test_cosine(framelength):
+    """
+    Test if the default window equals the SciPy window
+
+    """
+    import scipy.signal.windows
+    assert numpy.allclose(
+        stft.stft.cosine(framelength),
+        scipy.signal.windows.cosine(framelength)
+    )
+
+
+def test_batched_transform(signal, framelength, padding, halved):
+    """
+    Test if transforming all frames at once gives the same result as
+    transforming them one by one
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, halved=halved
+    )
+    y = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, halved=halved,
+        transform=[scipy.fft.fft, scipy.fft.fft]
+    )
+
+    assert numpy.allclose(x, y)
+
+
+def test_batched_inverse(signal, framelength, padding, halved):
+    """
+    Test if inverse transforming all frames at once gives the same result as
+    inverse transforming them one by one
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, halved=halved
+    )
+    y = stft.ispectrogram(x)
+    z = stft.ispectrogram(x, transform=[scipy.fft.ifft, scipy.fft.ifft])
+
+    assert numpy.allclose(y, z)
+
+
+def test_multichannel(length, framelength, halved):
+    """
+    Test if transforming all channels at once gives the same result as
+    transforming them one by one
+
+    """
+    a = numpy.random.random((length, 3))
+
+    x = stft.spectrogram(a, framelength=framelength, halved=halved)
+    y = stft.ispectrogram(x)
+
+    assert x.shape[-1] == 3
+    for i in range(3):
+        x_i = stft.spectrogram(a[:, i], framelength=framelength, halved=halved)
+        assert numpy.allclose(x[:, :, i], x_i)
+        assert numpy.allclose(y[:, i], stft.ispectrogram(x_i))
+
+
+def test_real_transform(signal, framelength, padding):
+    """
+    Test if the rfft fast path for halved spectra equals the full transform
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength, padding=padding)
+    y = stft.spectrogram(
+        signal, framelength=framelength, padding=padding,
+        transform=lambda x: scipy.fft.fft(x)
+    )
+
+    assert numpy.allclose(x, y)
+    assert numpy.allclose(
+        stft.ispectrogram(x),
+        stft.ispectrogram(x, transform=lambda x: scipy.fft.ifft(x))
+    )
+
+
+def test_single_precision(signal, framelength, halved):
+    """
+    Test if single precision is kept through transform and inverse
+
+    """
+    x = stft.spectrogram(
+        signal, framelength=framelength, halved=halved, dtype=numpy.float32
+    )
+    y = stft.ispectrogram(x)
+
+    assert x.dtype == numpy.complex64
+    assert y.dtype == numpy.float32
+    assert numpy.allclose(signal, y, atol=1e-5)
+
+
+@pytest.mark.parametrize('workers', [2, 3, -1])
+def test_workers(signal, framelength, halved, workers):
+    """
+    Test if parallel transforms are identical to serial transforms
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength, halved=halved)
+    y = stft.spectrogram(
+        signal, framelength=framelength, halved=halved, workers=workers
+    )
+
+    assert numpy.array_equal(x, y)
+    assert numpy.array_equal(
+        stft.ispectrogram(x), stft.ispectrogram(x, workers=workers)
+    )
+
+
+def test_workers_blocks(monkeypatch, signal):
+    """
+    Test if all blocks of frames share a single thread pool
+
+    """
+    monkeypatch.setattr(stft.stft, '_blocksize', 4096)
+    pools = []
+    executor = concurrent.futures.ThreadPoolExecutor
+
+    def counting(*args, **kwargs):
+        pools.append(None)
+        return executor(*args, **kwargs)
+
+    monkeypatch.setattr(
+        stft.stft.concurrent.futures, 'ThreadPoolExecutor', counting
+    )
+
+    x = stft.spectrogram(signal, framelength=256, workers=2)
+
+    assert len(pools) == 1
+    assert numpy.array_equal(x, stft.spectrogram(signal, framelength=256))
+
+
+def test_plan(signal, framelength, padding, halved):
+    """
+    Test if plans give the same result as spectrogram/ispectrogram
+
+    """
+    plan = stft.STFTPlan(
+        framelength=framelength, padding=padding, halved=halved
+    )
+    x = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, halved=halved
+    )
+    y = plan.forward(signal)
+
+    assert numpy.allclose(x, y)
+    assert x.shape[1] == plan.frames(len(signal))
+    assert numpy.allclose(
+        stft.ispectrogram(x), plan.inverse(y, outlength=len(signal))
+    )
+
 
+def test_plan_cache():
+    """
+    Test if plans are reused for the same settings
+
+    """
+    a = stft.stft.get_plan(framelength=512, transform=[scipy.fft.fft])
+    b = stft.stft.get_plan(framelength=512, transform=[scipy.fft.fft])
+    c = stft.stft.get_plan(framelength=1024)
+
+    assert a is b
+    assert a is not c
+
+    # Window arrays cannot be cached
+    window = numpy.ones(512)
+    assert (
+        stft.stft.get_plan(framelength=512, window=window) is not
+        stft.stft.get_plan(framelength=512, window=window)
+    )
+
+
+@pytest.mark.parametrize('blocksize', [1, 5000, 2 ** 20])
+@pytest.mark.parametrize('centered', [True, False])
+def test_framing(monkeypatch, signal, framelength, padding, centered,
+                 blocksize):
+    """
+    Test if framing without padded copies, in blocks of frames, equals
+    transforming the padded signal
+
+    """
+    monkeypatch.setattr(stft.stft, '_blocksize', blocksize)
+
+    data = signal
+    if centered:
+        data = stft.utils.center_pad(data, framelength)
+    data = stft.utils.pad(data, framelength, framelength // 2)
+    frames = stft.utils.frame(data, framelength, framelength // 2)
+
+    expected = stft.stft.process(
+        frames,
+        window=stft.stft.cosine(framelength),
+        halved=True,
+        transform=numpy.fft.fft,
+        padding=padding,
+    ).T
+
+    x = stft.spectrogram(
+        signal, framelength=framelength, padding=padding, centered=centered,
+        transform=numpy.fft.fft
+    )
+
+    assert numpy.allclose(x, expected)
+
+
+def test_short_signals():
+    """
+    Test if signals without any frame fully inside of them work
+
+    """
+    for length in [2, 100, 1023, 1024, 1025, 1536, 2047]:
+        a = numpy.random.random(length)
+        assert numpy.allclose(stft.ispectrogram(stft.spectrogram(a)), a)
+
+
+@pytest.mark.parametrize('dtype', [None, numpy.float32])
+def test_output(monkeypatch, signal, framelength, dtype):
+    """
+    Test if phase-less outputs equal reducing the complex spectrogram
+
+    """
+    monkeypatch.setattr(stft.stft, '_blocksize', 4096)
+
+    x = stft.spectrogram(signal, framelength=framelength, dtype=dtype)
+    magnitude = stft.spectrogram(
+        signal, framelength=framelength, dtype=dtype, output='magnitude'
+    )
+    power = stft.spectrogram(
+        signal, framelength=framelength, dtype=dtype, output='power'
+    )
+    db = stft.spectrogram(
+        signal, framelength=framelength, dtype=dtype, output='db'
+    )
+
+    assert magnitude.dtype == x.real.dtype
+    assert numpy.allclose(magnitude, numpy.abs(x))
+    assert numpy.allclose(power, numpy.abs(x) ** 2, rtol=1e-4)
+    assert numpy.allclose(
+        db, 10 * numpy.log10(numpy.maximum(numpy.abs(x) ** 2, 1e-10)),
+        rtol=1e-4, atol=1e-3
+    )
+
+    assert power.stft_settings.output == 'power'
+    with pytest.raises(ValueError):
+        stft.ispectrogram(power)
+
+    with pytest.raises(ValueError):
+        stft.spectrogram(signal, output='foo')
+
+
+@pytest.mark.parametrize('hopsize', [100, 256, 300, 333, 700])
+@pytest.mark.parametrize('centered', [True, False])
+def test_arbitrary_hopsize(signal, hopsize, centered):
+    """
+    Test if any hopsize and window reconstruct the signal
+
+    """
+    for window in [None, numpy.hanning(1026)[1:-1], numpy.ones(1024)]:
+        x = stft.spectrogram(
+            signal, framelength=1024, hopsize=hopsize, centered=centered,
+            window=window
+        )
+        assert numpy.allclose(stft.ispectrogram(x), signal)
+
+        y = stft.ispectrogram_batch([x, x[:, :3]])
+        assert numpy.allclose(y[0], signal)
+        assert numpy.allclose(
+            y[1], stft.ispectrogram(x[:, :3], outlength=len(y[1]))
+        )
+
+
+@pytest.mark.parametrize('start, stop', [
+    (0, 3), (1, 4), (3, None), (5, -2), (0, None), (-1, None)
+])
+@pytest.mark.parametrize('centered', [True, False])
+def test_frame_range(signal, framelength, start, stop, centered):
+    """
+    Test if ranges of frames equal slices of the entire transforms
+
+    """
+    x = stft.spectrogram(signal, framelength=framelength, centered=centered)
+
+    frames = range(x.shape[1])[start:stop]
+    if not frames:
+        pytest.skip("Empty range of frames")
+
+    y = stft.spectrogram(
+        signal, framelength=framelength, centered=centered, start=start,
+        stop=stop
+    )
+
+    assert numpy.allclose(y, x[:, start:stop])
+    assert y.stft_settings.frame_offset == frames[0]
+
+    with stft.profile() as p:
+        z = stft.ispectrogram(x, start=start, stop=stop)
+    assert p.as_dict()['calls'][0]['stages']['fft']['frames'] <= (
+        len(frames) + 2
+    )
+
+    # First and last sample covered by the frames
+    first = frames[0] * framelength // 2
+    last = (frames[-1] + 1) * framelength // 2
+    if centered:
+        first -= framelength // 2
+    else:
+        last += framelength // 2
+    first = max(first, 0)
+
+    assert numpy.allclose(z, stft.ispectrogram(x)[first:last])
+    assert numpy.allclose(z, signal[first:last])
+
+
+def test_frame_range_errors(signal):
+    with pytest.raises(ValueError):
+        stft.spectrogram(signal, start=3, stop=3)
+
+    with pytest.raises(ValueError):
+        stft.ispectrogram(stft.spectrogram(signal), start=3, stop=2)
+
+
+@pytest.mark.parametrize('output', ['complex', 'power'])
+@pytest.mark.parametrize('backend', ['numpy', 'scipy'])
+def test_out(signal, framelength, output, backend):
+    """
+    Test if writing into existing arrays equals the regular transforms
 
-def test_fallback(monkeypatch):
     """
-    Try monkeypatching signal.cosine away so we can test stft.stft.cosine.
-    Ignore AttributeErrors during monkeypatching, for older scipy versions
+    x = stft.spectrogram(
+        signal, framelength=framelength, output=output, backend=backend
+    )
+    out = numpy.zeros_like(x)
+    y = stft.spectrogram(
+        signal, framelength=framelength, output=output, backend=backend,
+        out=out
+    )
+    assert numpy.array_equal(out, x)
+    assert numpy.shares_memory(y, out)
+    assert y.stft_settings == x.stft_settings
+
+    if output == 'complex':
+        a = stft.ispectrogram(x)
+        out = numpy.zeros_like(a)
+        assert stft.ispectrogram(x, out=out) is out
+        assert numpy.array_equal(out, a)
+
+    with pytest.raises(ValueError):
+        stft.spectrogram(
+            signal, framelength=framelength, output=output,
+            out=numpy.zeros_like(x)[1:]
+        )
+
 
+def test_out_allocations(framelength):
     """
-    import scipy.signal
+    Test if repeated transforms into existing arrays allocate no memory
+
+    """
+    if numpy.fft.rfft not in stft.backends._out_transforms:
+        pytest.skip("numpy.fft does not support out=")
+
+    signal = numpy.random.random((2 ** 16, 2))
+    plan = stft.STFTPlan(framelength=framelength, backend='numpy')
+    x = plan.forward(signal)
+    a = plan.inverse(x)
+    out, aout = numpy.empty_like(x), numpy.empty_like(a)
+
+    def run():
+        plan.forward(signal, save_settings=False, out=out)
+        plan.inverse(x, out=aout)
+
+    run()
+    tracemalloc.start()
     try:
-        monkeypatch.setattr("scipy.signal.cosine", raiser)
-    except Exception:
-        pass
-    return test_windowlength_errors()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    assert peak < x.nbytes // 10
+
+
+def test_out_shared_plan(signal):
+    """
+    Test if plans shared by get_plan keep no intermediate arrays
+
+    """
+    x = stft.spectrogram(signal, output='power')
+    stft.spectrogram(signal, output='power', out=numpy.zeros_like(x))
+
+    assert stft.stft.get_plan()._local is None
+    assert stft.STFTPlan()._local is not None
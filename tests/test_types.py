@@ -0,0 +1,123 @@
+from __future__ import division
+import pickle
+import timeit
+import numpy
+import pytest
+import stft
+
+
+def test_settings_immutable():
+    """
+    Test if settings are immutable, hashable and behave like dicts
+
+    """
+    x = stft.spectrogram(numpy.random.random(10000))
+    settings = x.stft_settings
+
+    with pytest.raises(AttributeError):
+        settings.framelength = 512
+
+    assert settings['framelength'] == 1024
+    assert settings.get('outlength') == 10000
+    assert settings.get('foo', 1) == 1
+    assert settings == settings.replace()
+    assert hash(settings) == hash(settings.replace())
+    assert settings != settings.replace(framelength=512)
+
+    assert stft.types.STFTSettings.from_dict(settings.to_dict()) == settings
+
+
+def test_pickle(signal):
+    """
+    Test if pickling keeps the settings
+
+    """
+    x = stft.spectrogram(signal)
+    y = pickle.loads(pickle.dumps(x))
+
+    assert numpy.array_equal(x, y)
+    assert y.stft_settings == x.stft_settings
+    assert numpy.allclose(stft.ispectrogram(y), signal)
+
+
+@pytest.mark.parametrize('start', [0, 1, 5])
+def test_slicing(signal, start):
+    """
+    Test if slices of frames reconstruct the corresponding samples
+
+    """
+    x = stft.spectrogram(signal, framelength=1024)
+    y = x[:, start:start + 5]
+
+    assert y.stft_settings.frame_offset == start
+    assert x.stft_settings.frame_offset == 0
+
+    # Only samples covered by two frames of the slice are exact
+    lo = start * 512
+    offset = max(lo - 512, 0)
+    output = stft.ispectrogram(y)
+    assert numpy.allclose(
+        output[lo - offset:lo - offset + 2048], signal[lo:lo + 2048]
+    )
+
+
+def test_nested_slicing(signal):
+    """
+    Test if slices of slices accumulate their frame offsets, and settings
+    are only created once accessed
+
+    """
+    x = stft.spectrogram(signal, framelength=1024)
+    y = x[:, 2:][:, 1:4][:, 1:]
+    assert y.stft_settings.frame_offset == 4
+    assert y.stft_settings.replace(frame_offset=0) == x.stft_settings
+    assert numpy.array_equal(y, x[:, 4:6])
+
+    z = x[:, 3:]
+    z.stft_settings = x.stft_settings
+    assert z[:, 1:].stft_settings.frame_offset == 1
+
+    settings = x.stft_settings.replace(transform=[numpy.fft.fft])
+    assert settings.transform == (numpy.fft.fft,)
+    with pytest.raises(TypeError):
+        x.stft_settings.replace(foo=1)
+
+
+@pytest.mark.parametrize('channels', [None, 2])
+def test_frame_indexing(channels):
+    """
+    Test if an Ellipsis and integer frame indices keep the frame offset, and
+    non-contiguous or single frames drop the settings
+
+    """
+    shape = (10000,) if channels is None else (10000, channels)
+    x = stft.spectrogram(numpy.random.random(shape))
+
+    assert x[:, [1, 2, 3]].stft_settings.frame_offset == 1
+    assert x[:, 18:][:, [-1]].stft_settings.frame_offset == 20
+
+    for y in (x[:, 5], x[:, [1, 3]], x[:, 1:9:2], x[None, 5:]):
+        assert y.stft_settings is None
+
+    if channels is None:
+        assert x[..., 5:].stft_settings.frame_offset == 5
+    else:
+        assert x[..., 5:, :].stft_settings.frame_offset == 5
+        # Only selects channels
+        assert x[..., 1:].stft_settings.frame_offset == 0
+
+
+def test_slicing_cost():
+    """
+    Test if slicing frames costs little more than slicing a plain array
+
+    """
+    x = stft.spectrogram(numpy.random.random(10000))
+    a = numpy.asarray(x)
+
+    def cost(array):
+        return min(timeit.repeat(
+            lambda: array[:, 5:10], number=2000, repeat=5
+        ))
+
+    assert cost(x) < 20 * cost(a)
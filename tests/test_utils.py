@@ -1,5 +1,6 @@
+import numpy
 import pytest
-from stft.utils import pad, unpad
+from stft.utils import pad, unpad, overlap_add
 
 
 def test_padding(signal, framelength):
@@ -10,3 +11,14 @@ def test_padding(signal, framelength):
     out = unpad(tmp, len(signal))
 
     assert out.shape == signal.shape
+
+
+@pytest.mark.parametrize('hopsize', [128, 256, 300, 512])
+def test_overlap_add(framelength, hopsize):
+    frames = numpy.random.random((7, framelength))
+
+    expected = numpy.zeros(framelength + 6 * hopsize)
+    for j, sig in enumerate(frames):
+        expected[j * hopsize:j * hopsize + framelength] += sig
+
+    assert numpy.allclose(overlap_add(frames, hopsize), expected)